@@ -0,0 +1,343 @@
+"""
+Score analytics of a Multi Problem XBlock across all learners.
+
+Learner states of the block are read from a user state client, e.g. `DjangoXBlockUserStateClient` of
+edx-platform, and processed in chunks so that memory usage does not grow with the number of learners.
+Learners who did not load the block since `problem_stats` was introduced are scored from the persisted state of
+their selected child problems instead.
+Aggregates are vectorized with NumPy if it is installed, and computed in pure Python otherwise. NumPy is slow
+to import, so it is only imported once analytics are computed, not when the block is loaded.
+
+Scores of a block can be exported from a Django shell of the LMS with:
+
+    from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
+    from multi_problem_xblock.analytics import export_block_analytics
+
+    with open('scores.csv', 'w', newline='') as output:
+        summary = export_block_analytics(usage_key, cut_off_score, output, DjangoXBlockUserStateClient())
+"""
+
+import csv
+import io
+from functools import lru_cache
+from itertools import chain, islice
+
+from xblock.fields import Scope
+
+from .records import Record
+
+LEARNER_CSV_HEADER = ('username', 'completed', 'earned', 'possible', 'score', 'passed', 'missing_state')
+
+
+class ProblemSummary(Record):
+    """
+    Aggregated results of a child problem across learners.
+    """
+    __slots__ = ('usage_id', 'learners', 'submitted', 'correct', 'earned', 'possible', 'answers')
+
+    def __init__(self, usage_id, *, learners=0, submitted=0, correct=0, earned=0, possible=0, answers=None):
+        self.usage_id = usage_id
+        self.learners = learners
+        self.submitted = submitted
+        self.correct = correct
+        self.earned = earned
+        self.possible = possible
+        # Number of learners and correct answers of each question, keyed by answer id.
+        self.answers = answers or {}
+
+
+@lru_cache(maxsize=None)
+def get_numpy():
+    """
+    Import NumPy on first call, returns None if it is not installed.
+    """
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError:  # NumPy is optional, aggregates are computed in pure Python without it.
+        return None
+    return numpy
+
+
+def _chunks(iterable, size):
+    """
+    Split iterable in lists of `size` items, without consuming more than one chunk at a time.
+    """
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else 0
+
+
+def _get_child_state_stats(block_type, state):
+    """
+    Get a `problem_stats` entry from the persisted state of a child, like `MultiProblemBlock._get_child_stats`.
+
+    Capa problems persist their `done` and `score` fields. A problem without state was never loaded by the
+    learner, so it is not submitted. Other blocks do not support submissions.
+    """
+    if block_type != 'problem':
+        return None
+    state = state or {}
+    score = state.get('score') or {}
+    return {
+        'submitted': bool(state.get('done')),
+        'attempts': state.get('attempts', 0),
+        'earned': score.get('raw_earned', 0),
+        'possible': score.get('raw_possible', 0),
+    }
+
+
+class ScoreAnalytics:
+    """
+    Aggregates scores of learners from their `problem_stats` state of the block, chunk by chunk.
+
+    A learner completed the test if all their selected problems are submitted, and passed it if their score is
+    above the cut-off score, like in the `get_state` handler. A problem is answered correctly if it is submitted
+    with full score. Correctness of each question is read from the test results persisted once the learner
+    submitted all problems.
+
+    Without `problem_stats`, child problem states are read from `user_state_client` if it is given, one learner
+    at a time as the client reads the state of a single user. Learners without `selected` children, who never
+    saw the problems, are only counted as `missing_state`.
+    """
+
+    def __init__(self, cut_off_score, chunk_size=1000, use_numpy=None, user_state_client=None, course_key=None):
+        self.cut_off_score = cut_off_score
+        self.chunk_size = chunk_size
+        self.use_numpy = get_numpy() is not None if use_numpy is None else use_numpy
+        self.user_state_client = user_state_client
+        self.course_key = course_key
+        self.missing_state = 0
+        self.learners = 0
+        self.completed = 0
+        self.passed = 0
+        self.earned = 0
+        self.possible = 0
+        self.problems = {}
+
+    def process(self, states):
+        """
+        Aggregate learner states, an iterable of `XBlockUserState`, and yield a result row of each learner.
+
+        Rows are tuples of `LEARNER_CSV_HEADER` values. Aggregates are complete once all rows are consumed.
+        """
+        for chunk in _chunks(states, self.chunk_size):
+            yield from self._process_chunk(chunk)
+
+    def _read_child_stats(self, user_state):
+        """
+        Build `problem_stats` of a learner from the persisted state of their selected children.
+        """
+        selected = user_state.state.get('selected')
+        if not selected or self.user_state_client is None:
+            return None
+        child_keys = {
+            self.course_key.make_usage_key(block_type, block_id): block_type for block_type, block_id in selected
+        }
+        child_states = {
+            child_state.block_key: child_state.state
+            for child_state in self.user_state_client.get_many(
+                user_state.username, list(child_keys), scope=Scope.user_state
+            )
+        }
+        return {
+            str(child_key): _get_child_state_stats(block_type, child_states.get(child_key))
+            for child_key, block_type in child_keys.items()
+        }
+
+    def _count_answers(self, test_results):
+        """
+        Add correctness of each question of persisted test results to the problem summaries.
+        """
+        for usage_id, answers in test_results.get('correctness', {}).items():
+            if usage_id not in self.problems:
+                self.problems[usage_id] = ProblemSummary(usage_id)
+            problem_answers = self.problems[usage_id].answers
+            for answer_id, is_correct in answers.items():
+                totals = problem_answers.setdefault(answer_id, [0, 0])
+                totals[0] += 1
+                totals[1] += bool(is_correct)
+
+    def _process_chunk(self, chunk):
+        """
+        Aggregate a chunk of learner states and return their result rows.
+        """
+        usernames = []
+        # Username and position in `usernames` of each learner of the chunk, None if their state is missing.
+        chunk_learners = []
+        # Flat arrays of child problem entries, `learners` holds the position of the learner in `usernames`.
+        learners, problems, earned, possible, submitted = [], [], [], [], []
+        for user_state in chunk:
+            # The learner may not have loaded the block since problem_stats was introduced.
+            problem_stats = user_state.state.get('problem_stats') or self._read_child_stats(user_state)
+            if not problem_stats:
+                self.missing_state += 1
+                chunk_learners.append((user_state.username, None))
+                continue
+            learner = len(usernames)
+            usernames.append(user_state.username)
+            chunk_learners.append((user_state.username, learner))
+            self._count_answers(user_state.state.get('test_results') or {})
+            for usage_id, stats in problem_stats.items():
+                if stats is None:
+                    continue
+                if usage_id not in self.problems:
+                    self.problems[usage_id] = ProblemSummary(usage_id)
+                learners.append(learner)
+                problems.append(usage_id)
+                earned.append(stats['earned'])
+                possible.append(stats['possible'])
+                submitted.append(stats['submitted'])
+        if not usernames:
+            return [(username, None, None, None, None, None, True) for username, _learner in chunk_learners]
+
+        aggregate = self._aggregate_numpy if self.use_numpy else self._aggregate_python
+        learner_totals, problem_totals = aggregate(len(usernames), learners, problems, earned, possible, submitted)
+        for usage_id, totals in problem_totals.items():
+            problem = self.problems[usage_id]
+            problem.learners += totals[0]
+            problem.submitted += totals[1]
+            problem.correct += totals[2]
+            problem.earned += totals[3]
+            problem.possible += totals[4]
+
+        rows = []
+        for username, learner in chunk_learners:
+            if learner is None:
+                rows.append((username, None, None, None, None, None, True))
+                continue
+            learner_earned, learner_possible, completed = learner_totals[learner]
+            passed = completed and learner_earned >= self.cut_off_score * learner_possible
+            self.learners += 1
+            self.completed += completed
+            self.passed += passed
+            self.earned += learner_earned
+            self.possible += learner_possible
+            score = round(_ratio(learner_earned, learner_possible), 4)
+            rows.append((username, completed, learner_earned, learner_possible, score, passed, False))
+        return rows
+
+    @staticmethod
+    def _aggregate_numpy(learners_count, learners, problems, earned, possible, submitted):
+        """
+        Vectorized totals of each learner and each problem of a chunk.
+
+        Returns:
+            tuple: list of (earned, possible, completed) of each learner, and dict of
+                (learners, submitted, correct, earned, possible) of each problem.
+        """
+        # pylint: disable=too-many-positional-arguments,no-member
+        np = get_numpy()
+        learners = np.asarray(learners, dtype=np.intp)
+        usage_ids, problems = np.unique(np.asarray(problems, dtype=object), return_inverse=True)
+        earned = np.asarray(earned, dtype=float)
+        possible = np.asarray(possible, dtype=float)
+        submitted = np.asarray(submitted, dtype=bool)
+        correct = submitted & (possible > 0) & (earned >= possible)
+
+        learner_earned = np.bincount(learners, weights=earned, minlength=learners_count)
+        learner_possible = np.bincount(learners, weights=possible, minlength=learners_count)
+        learner_problems = np.bincount(learners, minlength=learners_count)
+        learner_submitted = np.bincount(learners, weights=submitted, minlength=learners_count)
+        completed = learner_submitted == learner_problems
+        learner_totals = zip(learner_earned.tolist(), learner_possible.tolist(), completed.tolist())
+
+        problem_totals = np.stack([
+            np.bincount(problems, minlength=len(usage_ids)),
+            np.bincount(problems, weights=submitted, minlength=len(usage_ids)),
+            np.bincount(problems, weights=correct, minlength=len(usage_ids)),
+            np.bincount(problems, weights=earned, minlength=len(usage_ids)),
+            np.bincount(problems, weights=possible, minlength=len(usage_ids)),
+        ], axis=1)
+        return list(learner_totals), dict(zip(usage_ids.tolist(), problem_totals.tolist()))
+
+    @staticmethod
+    def _aggregate_python(learners_count, learners, problems, earned, possible, submitted):
+        """
+        Pure Python equivalent of `_aggregate_numpy`.
+        """
+        # pylint: disable=too-many-positional-arguments
+        learner_totals = [[0.0, 0.0, True] for _learner in range(learners_count)]
+        problem_totals = {}
+        for learner, usage_id, problem_earned, problem_possible, problem_submitted in zip(
+            learners, problems, earned, possible, submitted
+        ):
+            totals = learner_totals[learner]
+            totals[0] += problem_earned
+            totals[1] += problem_possible
+            totals[2] = totals[2] and bool(problem_submitted)
+            correct = bool(problem_submitted) and 0 < problem_possible <= problem_earned
+            totals = problem_totals.setdefault(usage_id, [0, 0, 0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += bool(problem_submitted)
+            totals[2] += correct
+            totals[3] += problem_earned
+            totals[4] += problem_possible
+        return [tuple(totals) for totals in learner_totals], problem_totals
+
+    def summary(self):
+        """
+        Get aggregated results of all processed learners.
+
+        Rates and averages only cover `learners` with a score, not the `missing_state` ones.
+        """
+        return {
+            'learners': self.learners,
+            'missing_state': self.missing_state,
+            'completed': self.completed,
+            'passed': self.passed,
+            'pass_rate': _ratio(self.passed, self.learners),
+            'average_score': _ratio(self.earned, self.possible),
+            'problems': [
+                {
+                    'usage_id': problem.usage_id,
+                    'learners': int(problem.learners),
+                    'submitted': int(problem.submitted),
+                    'correct': int(problem.correct),
+                    'correct_rate': _ratio(problem.correct, problem.submitted),
+                    'average_score': _ratio(problem.earned, problem.possible),
+                    'answers': [
+                        {
+                            'answer_id': answer_id,
+                            'learners': learners,
+                            'correct': correct,
+                            'correct_rate': _ratio(correct, learners),
+                        }
+                        for answer_id, (learners, correct) in problem.answers.items()
+                    ],
+                }
+                for problem in self.problems.values()
+            ],
+        }
+
+
+def iter_csv_lines(rows, header=LEARNER_CSV_HEADER):
+    """
+    Encode rows as CSV lines one by one, to stream them in a response.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in chain([header], rows):
+        writer.writerow(row)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_block_analytics(usage_key, cut_off_score, output, user_state_client, chunk_size=1000):
+    """
+    Write result rows of all learners of a block as CSV into `output` and return the aggregated results.
+    """
+    analytics = ScoreAnalytics(
+        cut_off_score, chunk_size=chunk_size, user_state_client=user_state_client, course_key=usage_key.course_key
+    )
+    writer = csv.writer(output)
+    writer.writerow(LEARNER_CSV_HEADER)
+    for row in analytics.process(user_state_client.iter_all_for_block(usage_key, scope=Scope.user_state)):
+        writer.writerow(row)
+    return analytics.summary()
@@ -0,0 +1,120 @@
+"""
+Bulk reset of the state of many learners of a Multi Problem XBlock.
+
+Learners are reset in batches through a user state client, e.g. `DjangoXBlockUserStateClient` of edx-platform.
+Each batch reports the offset of the next one, so that an interrupted reset can be resumed from there. Resetting
+a learner again is harmless, state of their child problems is deleted before the state of the block. Learners
+without state of the block never opened it and are skipped, so that no state is created for them.
+
+Deleting child state through the user state client does not touch grades: persisted scores of the problems and
+subsection grades keep the old results. Pass `reset_child_attempts` to reset children like the "Reset student
+attempts" instructor action instead, e.g. with edx-platform's `reset_student_attempts`, which also resets their
+scores and recalculates grades. The `bulk_reset_selected_children` handler does so in the LMS.
+
+User state clients only write state of one learner at a time, so each reset learner costs two writes: deletion
+of their child problems state and reset of the block state.
+
+Learners of a block can be reset from a Django shell of the LMS with:
+
+    from django.contrib.auth.models import User
+    from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
+    from lms.djangoapps.instructor.enrollment import reset_student_attempts
+    from multi_problem_xblock.bulk_reset import iter_reset_learners
+
+    staff_user = User.objects.get(username=staff_username)
+
+    def reset_child_attempts(username, child_keys):
+        student = User.objects.get(username=username)
+        for child_key in child_keys:
+            reset_student_attempts(usage_key.course_key, student, child_key, staff_user, delete_module=True)
+
+    for progress in iter_reset_learners(
+        DjangoXBlockUserStateClient(), usage_key, child_keys, usernames, reset_child_attempts=reset_child_attempts
+    ):
+        print(progress)
+"""
+
+import logging
+
+from xblock.fields import Scope
+
+logger = logging.getLogger(__name__)
+
+# Block state of a learner after reset, `selected` is emptied so that children are selected again.
+RESET_BLOCK_STATE = {
+    'selected': [],
+    'current_slide': 0,
+    'problem_stats': {},
+    'test_results': {},
+    'published_completion': None,
+}
+
+
+def reset_learners(
+    user_state_client, block_key, child_keys, usernames, offset=0, batch_size=100, reset_child_attempts=None
+):
+    """
+    Reset state of a batch of `batch_size` learners of the block, starting at `offset` in `usernames`.
+
+    State of all child problems of a learner is deleted with a single call, and the block state is reset with
+    another one. Learners without state of the block are skipped.
+
+    If given, `reset_child_attempts(username, child_keys)` is called with the children having state instead of
+    deleting it, to reset their scores and grades as well.
+
+    Returns:
+        dict: `offset` of the next batch, number of `reset` and `skipped` learners, `failed` usernames, `total`
+            number of learners and whether the reset is `done`.
+    """
+    # pylint: disable=too-many-positional-arguments
+    batch = usernames[offset:offset + batch_size]
+    failed = []
+    skipped = 0
+    for username in batch:
+        try:
+            if not any(True for _state in user_state_client.get_many(username, [block_key], scope=Scope.user_state)):
+                skipped += 1
+                continue
+            if child_keys and reset_child_attempts is None:
+                user_state_client.delete_many(username, child_keys, scope=Scope.user_state)
+            elif child_keys:
+                # Only children with state have attempts and a score to reset.
+                child_state_keys = [
+                    child_state.block_key
+                    for child_state in user_state_client.get_many(username, child_keys, scope=Scope.user_state)
+                ]
+                if child_state_keys:
+                    reset_child_attempts(username, child_state_keys)
+            user_state_client.set_many(username, {block_key: dict(RESET_BLOCK_STATE)}, scope=Scope.user_state)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Unable to reset state of learner %s of Multi Problem Block %s', username, block_key)
+            failed.append(username)
+    next_offset = offset + len(batch)
+    logger.info(
+        'Reset %d of %d learners of Multi Problem Block %s', next_offset, len(usernames), block_key,
+    )
+    return {
+        'offset': next_offset,
+        'reset': len(batch) - len(failed) - skipped,
+        'skipped': skipped,
+        'failed': failed,
+        'total': len(usernames),
+        'done': next_offset >= len(usernames),
+    }
+
+
+def iter_reset_learners(
+    user_state_client, block_key, child_keys, usernames, offset=0, batch_size=100, reset_child_attempts=None
+):
+    """
+    Reset state of all learners from `offset`, yielding progress of each batch.
+    """
+    # pylint: disable=too-many-positional-arguments
+    while True:
+        progress = reset_learners(
+            user_state_client, block_key, child_keys, usernames, offset, batch_size, reset_child_attempts
+        )
+        yield progress
+        if progress['done']:
+            return
+        offset = progress['offset']
@@ -1,14 +1,18 @@
 """
 Compatibility layer to import LibraryContentBlock from edx-platform
+
+Symbols are resolved on first call and cached, so that fallback imports are only attempted once per process.
 """
 
 import logging
+from functools import lru_cache
 
 from xblock.core import XBlock
 
 log = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
 def getLibraryContentBlock():
     """Get LibraryContentBlock from edx-platform if possible"""
     try:
@@ -53,6 +57,7 @@ class L_ShowCorrectness:
     NEVER = 'never'
 
 
+@lru_cache(maxsize=None)
 def getShowAnswerOptions():
     """Get SHOWANSWER constant from xmodule/capa_block.py"""
     try:
@@ -70,6 +75,7 @@ def getShowAnswerOptions():
         return L_SHOWANSWER
 
 
+@lru_cache(maxsize=None)
 def getShowCorrectnessOptions():
     """Get ShowCorrectness constant from xmodule/graders.py"""
     try:
@@ -81,6 +87,7 @@ def getShowCorrectnessOptions():
         return L_ShowCorrectness
 
 
+@lru_cache(maxsize=None)
 def getStudentView():
     """Get STUDENT_VIEW constant from xmodule/x_module.py"""
     try:
@@ -90,3 +97,26 @@ def getStudentView():
     except ModuleNotFoundError:
         log.warning('STUDENT_VIEW not found, using raw string')
         return 'student_view'
+
+
+@lru_cache(maxsize=None)
+def getResetStudentAttempts():
+    """Get reset_student_attempts from lms/djangoapps/instructor/enrollment.py, which also resets problem scores"""
+    try:
+        # pylint: disable=import-outside-toplevel
+        from lms.djangoapps.instructor.enrollment import reset_student_attempts
+    except ModuleNotFoundError:
+        log.warning('reset_student_attempts not found, bulk reset does not reset problem scores')
+        return None
+    return reset_student_attempts
+
+
+def getUserStateClient():
+    """Get DjangoXBlockUserStateClient from lms/djangoapps/courseware/user_state_client.py to read state of all users"""
+    try:
+        # pylint: disable=import-outside-toplevel
+        from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
+    except ModuleNotFoundError:
+        log.warning('DjangoXBlockUserStateClient not found, learner analytics are not available')
+        return None
+    return DjangoXBlockUserStateClient()
@@ -0,0 +1,257 @@
+"""
+Metrics instrumentation of the Multi Problem XBlock views and handlers.
+
+Metrics are sent to a pluggable backend, which does nothing by default. Set `METRICS_BACKEND` in the
+`MultiProblemBlock` bucket of XBLOCK_SETTINGS to the dotted path of a callable returning a backend, or call
+`set_metrics_backend`. Each instrumented view or handler records:
+
+* `<name>.latency`: time taken, in seconds
+* `<name>.children_loaded`: number of child blocks loaded
+* `<name>.child_renders`: number of child blocks rendered
+* `<name>.template_render`: time taken to render templates, in seconds
+* `<name>.response_size`: size of the response body or fragment content, in characters
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.utils.module_loading import import_string
+
+from .utils import get_xblock_settings
+
+logger = logging.getLogger(__name__)
+
+
+class NullMetricsBackend:
+    """
+    Backend discarding all metrics.
+    """
+
+    def timing(self, name, seconds):
+        """
+        Record a duration in seconds.
+        """
+
+    def histogram(self, name, value):
+        """
+        Record a value in a distribution.
+        """
+
+    def increment(self, name, value=1):
+        """
+        Increment a counter.
+        """
+
+
+class StatsdMetricsBackend(NullMetricsBackend):
+    """
+    Backend sending metrics through a statsd client, e.g. `statsd.StatsClient` or `datadog.statsd`.
+    """
+
+    def __init__(self, client, prefix='multi_problem_xblock'):
+        self.client = client
+        self.prefix = prefix
+
+    def _name(self, name):
+        return f'{self.prefix}.{name}'
+
+    def timing(self, name, seconds):
+        # statsd timers are in milliseconds
+        self.client.timing(self._name(name), seconds * 1000)
+
+    def histogram(self, name, value):
+        if hasattr(self.client, 'histogram'):
+            self.client.histogram(self._name(name), value)
+        else:
+            self.client.timing(self._name(name), value)
+
+    def increment(self, name, value=1):
+        self.client.incr(self._name(name), value)
+
+
+class PrometheusMetricsBackend(NullMetricsBackend):
+    """
+    Backend exposing metrics as `prometheus_client` histograms and counters, labelled by view or handler name.
+    """
+
+    def __init__(self, registry=None, prefix='multi_problem_xblock'):
+        # pylint: disable=import-outside-toplevel,import-error
+        from prometheus_client import REGISTRY, Counter, Histogram
+
+        self._counter_class = Counter
+        self._histogram_class = Histogram
+        self.registry = registry or REGISTRY
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_metric(self, metric_class, name):
+        """
+        Get metric for the `<view>.<metric>` name, labelled with the view name.
+        """
+        view, _, metric_name = name.rpartition('.')
+        with self._lock:
+            if metric_name not in self._metrics:
+                self._metrics[metric_name] = metric_class(
+                    f'{self.prefix}_{metric_name}',
+                    f'Multi Problem XBlock {metric_name.replace("_", " ")}',
+                    ['view'],
+                    registry=self.registry,
+                )
+        return self._metrics[metric_name].labels(view=view or 'block')
+
+    def timing(self, name, seconds):
+        self._get_metric(self._histogram_class, name).observe(seconds)
+
+    def histogram(self, name, value):
+        self._get_metric(self._histogram_class, name).observe(value)
+
+    def increment(self, name, value=1):
+        self._get_metric(self._counter_class, name).inc(value)
+
+
+class InMemoryMetricsBackend(NullMetricsBackend):
+    """
+    Backend keeping metrics in memory, used by tests.
+    """
+
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.histograms = defaultdict(list)
+        self.counters = defaultdict(int)
+
+    def timing(self, name, seconds):
+        self.timings[name].append(seconds)
+
+    def histogram(self, name, value):
+        self.histograms[name].append(value)
+
+    def increment(self, name, value=1):
+        self.counters[name] += value
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def set_metrics_backend(backend):
+    """
+    Set metrics backend of the process, `None` to load it from XBLOCK_SETTINGS again.
+    """
+    global _backend  # pylint: disable=global-statement
+    _backend = backend
+
+
+def get_metrics_backend():
+    """
+    Get metrics backend, loading it from `METRICS_BACKEND` in XBLOCK_SETTINGS on first use.
+    """
+    global _backend  # pylint: disable=global-statement
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_path = get_xblock_settings().get('METRICS_BACKEND')
+                try:
+                    _backend = import_string(backend_path)() if backend_path else NullMetricsBackend()
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception('Unable to load metrics backend %s, metrics are disabled', backend_path)
+                    _backend = NullMetricsBackend()
+    return _backend
+
+
+class MetricsRecorder:
+    """
+    Collects metrics of a single view or handler call, sent to the backend once the call ends.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = defaultdict(int)
+        self.timings = defaultdict(float)
+        # Children may be rendered by a pool of threads sharing the recorder of the request.
+        self._lock = threading.Lock()
+
+    def count(self, metric, value=1):
+        """
+        Add `value` to a counted metric, e.g. `children_loaded`.
+        """
+        with self._lock:
+            self.counts[metric] += value
+
+    @contextmanager
+    def timer(self, metric):
+        """
+        Add time taken by the wrapped code to a timed metric, e.g. `template_render`.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start_time
+            with self._lock:
+                self.timings[metric] += duration
+
+    def flush(self, latency, response_size=None):
+        """
+        Send collected metrics to the backend.
+        """
+        backend = get_metrics_backend()
+        backend.timing(f'{self.name}.latency', latency)
+        for metric in ('children_loaded', 'child_renders'):
+            backend.histogram(f'{self.name}.{metric}', self.counts[metric])
+        for metric, value in self.timings.items():
+            backend.timing(f'{self.name}.{metric}', value)
+        if response_size is not None:
+            backend.histogram(f'{self.name}.response_size', response_size)
+
+
+# Recorder discarding metrics recorded outside of instrumented views and handlers.
+_null_recorder = MetricsRecorder('block')
+_current_recorder = ContextVar('multi_problem_metrics_recorder', default=None)
+
+
+def current_metrics():
+    """
+    Get recorder of the instrumented view or handler being executed.
+    """
+    recorder = _current_recorder.get()
+    if recorder is None:
+        _null_recorder.counts.clear()
+        _null_recorder.timings.clear()
+        return _null_recorder
+    return recorder
+
+
+def _get_response_size(result):
+    """
+    Get size of a webob Response body or of a Fragment content.
+    """
+    if hasattr(result, 'content_length') and result.content_length is not None:
+        return result.content_length
+    content = getattr(result, 'content', None)
+    return len(content) if isinstance(content, (str, bytes)) else None
+
+
+def instrumented(name):
+    """
+    Decorator recording metrics of the decorated view or handler under `name`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = MetricsRecorder(name)
+            token = _current_recorder.set(recorder)
+            start_time = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _current_recorder.reset(token)
+            recorder.flush(time.perf_counter() - start_time, _get_response_size(result))
+            return result
+        return wrapper
+    return decorator
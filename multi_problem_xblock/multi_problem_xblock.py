@@ -2,35 +2,73 @@
 
 # Imports ###########################################################
 
+import contextvars
+import hashlib
 import json
 import logging
 import math
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from copy import copy
+from functools import partial
 
-from lxml import etree
-from lxml.etree import XMLSyntaxError
+from django.db import connections
+from django.utils import translation
 from web_fragments.fragment import Fragment
 from webob import Response
 from xblock.completable import XBlockCompletionMode
 from xblock.core import XBlock
-from xblock.fields import Boolean, Float, Integer, Scope, String
+from xblock.exceptions import JsonHandlerError
+from xblock.fields import Boolean, Dict, Float, Integer, Scope, String
+
+try:
+    import crum
+except ImportError:  # crum is installed with edx-platform, other runtimes do not track the current request.
+    crum = None
 
 try:
     from xblock.utils.resources import ResourceLoader
 except ModuleNotFoundError:  # For backward compatibility with releases older than Quince.
     from xblockutils.resources import ResourceLoader
 
-from .compat import getLibraryContentBlock, getShowAnswerOptions, getShowCorrectnessOptions, getStudentView
-from .utils import _
+from .analytics import ScoreAnalytics, iter_csv_lines
+from .bulk_reset import reset_learners
+from .compat import (
+    getLibraryContentBlock,
+    getResetStudentAttempts,
+    getShowAnswerOptions,
+    getShowCorrectnessOptions,
+    getStudentView,
+    getUserStateClient,
+)
+from .metrics import current_metrics, get_metrics_backend, instrumented
+from .records import ChildSnapshot, QuestionAnswer, SlideItem
+from .utils import (
+    ContentCache,
+    LRUCache,
+    _,
+    add_unique_fragment_resources,
+    get_xblock_settings,
+    render_django_template,
+)
 
 # Globals ###########################################################
 
 loader = ResourceLoader(__name__)
 logger = logging.getLogger(__name__)
+# Base class and field choices are needed to define the block, other compat symbols are resolved on first use.
 LibraryContentBlock = getLibraryContentBlock()
 SHOWANSWER = getShowAnswerOptions()
-ShowCorrectness = getShowCorrectnessOptions()
-STUDENT_VIEW = getStudentView()
+# Placeholder of the slides in the student view layout template, replaced by slides rendered one by one.
+SLIDES_MARKER = '<!--multi-problem-slides-->'
+# Rendered test results per user, invalidated when the user attempt state changes.
+TEST_RESULTS_CACHE = LRUCache(maxsize=1024, ttl=15 * 60)
+# Question labels and correct answer text of child problems, keyed by content version and answer id.
+QUESTION_TEXT_CACHE = ContentCache('multi_problem_question_text')
+# Number of completion events emitted and suppressed as the value did not change, in this process.
+COMPLETION_PUBLISH_STATS = Counter(emitted=0, suppressed=0)
 
 
 # Classes ###########################################################
@@ -55,7 +93,9 @@ class SCORE_DISPLAY_FORMAT:
     X_OUT_OF_Y = 'x_out_of_y'
 
 
-@XBlock.wants('library_tools', 'studio_user_permissions', 'user', 'completion', 'bookmarks')
+@XBlock.wants(
+    'library_tools', 'studio_user_permissions', 'user', 'completion', 'bookmarks', 'settings', 'user_state_client'
+)
 class MultiProblemBlock(LibraryContentBlock):
     """
     Multi problem xblock using LibraryContentBlock as base.
@@ -147,6 +187,24 @@ class MultiProblemBlock(LibraryContentBlock):
 
     current_slide = Integer(help=_('Stores current slide/problem number for a user'), scope=Scope.user_state, default=0)
 
+    published_completion = Float(
+        help=_('Stores last completion value published for a user'),
+        scope=Scope.user_state,
+        default=None,
+    )
+
+    problem_stats = Dict(
+        help=_('Stores submission status and score of each child problem for a user, keyed by child usage id'),
+        scope=Scope.user_state,
+        default={},
+    )
+
+    test_results = Dict(
+        help=_('Stores score summary and question answers of a user, computed when the last problem is submitted'),
+        scope=Scope.user_state,
+        default={},
+    )
+
     @property
     def non_editable_metadata_fields(self):
         """
@@ -155,22 +213,63 @@ class MultiProblemBlock(LibraryContentBlock):
         non_editable_fields = []
         if hasattr(super(), 'non_editable_metadata_fields'):
             non_editable_fields = super().non_editable_metadata_fields
-        non_editable_fields.extend([MultiProblemBlock.current_slide])
+        non_editable_fields.extend(
+            [
+                MultiProblemBlock.current_slide,
+                MultiProblemBlock.published_completion,
+                MultiProblemBlock.problem_stats,
+                MultiProblemBlock.test_results,
+            ]
+        )
         return non_editable_fields
 
+    def _get_xblock_setting(self, name, default=None):
+        """
+        Get a value from the XBLOCK_SETTINGS bucket of this block, falling back to `default`.
+        """
+        settings_service = self.runtime.service(self, 'settings')
+        if not settings_service:
+            return default
+        return settings_service.get_settings_bucket(self, default={}).get(name, default)
+
+    @staticmethod
+    def _set_child_field(child, field_name, value):
+        """
+        Set field value of a child block.
+
+        Returns False if the child has no such field or if it is already explicitly set to the same value.
+        """
+        field = child.fields.get(field_name)
+        if field is None or (field.is_set_on(child) and field.read_from(child) == value):
+            return False
+        field.write_to(child, value)
+        return True
+
     def _process_display_feedback(self, child):
         """
-        Set child correctness based on parent display_feedback
+        Set child correctness based on parent display_feedback, returns True if the child was updated.
         """
         if not hasattr(child, 'show_correctness'):
-            return
+            return False
         # If display_feedback is IMMEDIATELY, show answers immediately after submission as well as at the end
         # In other cases i.e., END_OF_TEST & NEVER, set show_correctness to never
         # and display correctness via force argument in the last slide if display_feedback set to END_OF_TEST
         # HACK: For some reason, child.show_correctness is not saved if self.show_correctness is not updated.
-        self.show_correctness = child.show_correctness = (  # pylint: disable=attribute-defined-outside-init
-            ShowCorrectness.ALWAYS if self.display_feedback == DISPLAYFEEDBACK.IMMEDIATELY else ShowCorrectness.NEVER
+        show_correctness_options = getShowCorrectnessOptions()
+        self.show_correctness = (  # pylint: disable=attribute-defined-outside-init
+            show_correctness_options.ALWAYS
+            if self.display_feedback == DISPLAYFEEDBACK.IMMEDIATELY
+            else show_correctness_options.NEVER
         )
+        return self._set_child_field(child, 'show_correctness', self.show_correctness)
+
+    def _bulk_operations(self):
+        """
+        Context manager grouping modulestore reads and writes of the course, if the runtime supports it.
+        """
+        modulestore = getattr(self.runtime, 'modulestore', None)
+        bulk_operations = getattr(modulestore, 'bulk_operations', None)
+        return bulk_operations(self.usage_key.course_key) if callable(bulk_operations) else nullcontext()
 
     def editor_saved(self, user, old_metadata, old_content):
         """
@@ -178,99 +277,356 @@ class MultiProblemBlock(LibraryContentBlock):
         child.showanswer <- self.showanswer
         child.weight <- self.weight
         child.show_correctness <- ALWAYS if display_feedback == IMMEDIATELY else NEVER
+
+        Only children whose values differ are saved, within a single modulestore bulk operation.
         """
         if hasattr(super(), 'editor_saved'):
             super().editor_saved(user, old_metadata, old_content)
-        for child in self.get_children():
-            if hasattr(child, 'showanswer'):
-                child.showanswer = self.showanswer
-            self._process_display_feedback(child)
-            child.save()
+        start_time = time.perf_counter()
+        changed_settings = [
+            field_name
+            for field_name in ('showanswer', 'display_feedback')
+            if (old_metadata or {}).get(field_name, self.fields[field_name].default) != getattr(self, field_name)
+        ]
+        updated_children = []
+        children = self.get_children()
+        for child in children:
+            updated = self._set_child_field(child, 'showanswer', self.showanswer)
+            # Process display feedback even if showanswer is updated, to keep the child in sync.
+            updated = self._process_display_feedback(child) or updated
+            if updated:
+                updated_children.append(child)
+        if updated_children:
+            with self._bulk_operations():
+                for child in updated_children:
+                    child.save()
+        logger.info(
+            'Updated %d of %d children of %s in %.3fs (changed settings: %s)',
+            len(updated_children),
+            len(children),
+            self.usage_key,
+            time.perf_counter() - start_time,
+            ', '.join(changed_settings) or 'none',
+        )
 
     @XBlock.json_handler
     def handle_slide_change(self, data, suffix=None):
         """
         Handle slide change request, triggered when user clicks on next or previous button.
+
+        The field is only written when its value changes to avoid needless user state writes.
         """
-        self.current_slide = data.get('current_slide')
+        current_slide = data.get('current_slide')
+        if current_slide != self.current_slide:
+            self.current_slide = current_slide
         return Response()
 
     @staticmethod
     def _calculate_progress_percentage(completed_problems, total_problems):
         return int((completed_problems / (total_problems or 1)) * 100)
 
+    def _load_children(self, usage_keys):
+        """
+        Load child blocks of the given usage keys, returned in the same order.
+
+        Children are loaded one by one, as runtimes only provide `get_block`, within a modulestore bulk operation
+        if available so that the course structure is fetched only once.
+        """
+        if not usage_keys:
+            return []
+        current_metrics().count('children_loaded', len(usage_keys))
+        with self._bulk_operations():
+            return [self.runtime.get_block(usage_key) for usage_key in usage_keys]
+
     def _children_iterator(self, filter_block_type=None):
         """
         Generator to yield child problem blocks.
+
+        Usage keys of all selected children are collected first so that children are loaded within a single
+        modulestore bulk operation.
         """
         # use selected_children method from LibraryContentBlock to get child xblocks.
-        for index, (block_type, block_id) in enumerate(self.selected_children()):
-            if filter_block_type and (block_type != filter_block_type):
-                continue
-            child = self.runtime.get_block(self.usage_key.course_key.make_usage_key(block_type, block_id))
+        selected_children = [
+            (index, block_type, self.usage_key.course_key.make_usage_key(block_type, block_id))
+            for index, (block_type, block_id) in enumerate(self.selected_children())
+            if not filter_block_type or block_type == filter_block_type
+        ]
+        children = self._load_children([usage_key for _index, _block_type, usage_key in selected_children])
+        for (index, block_type, _usage_key), child in zip(selected_children, children):
             yield (index, block_type, child)
 
+    def _problem_usage_keys(self):
+        """
+        Get usage keys of selected child problems mapped by their string representation.
+        """
+        return {
+            str(usage_key): usage_key
+            for usage_key in (
+                self.usage_key.course_key.make_usage_key(block_type, block_id)
+                for block_type, block_id in self.selected_children()
+                if block_type == 'problem'
+            )
+        }
+
+    @staticmethod
+    def _get_child_stats(child):
+        """
+        Get submission status and score of a child problem, `None` if the child does not support submissions.
+
+        Reads persisted `done` and `score` fields of capa problems, so that their LoncapaProblem is not built
+        only to get the score. It is only built for problems submitted before their score was persisted.
+        """
+        if not hasattr(child, 'is_submitted'):
+            return None
+        # `is_submitted` of capa problems returns `lcp.done`, which is initialized from the `done` field.
+        submitted = child.done if 'done' in child.fields else child.is_submitted()
+        score = getattr(child, 'score', None)
+        if score is None and submitted and hasattr(child, 'calculate_score'):
+            score = child.calculate_score()
+        return {
+            'submitted': bool(submitted),
+            'attempts': getattr(child, 'attempts', 0),
+            'earned': score.raw_earned if score else 0,
+            'possible': score.raw_possible if score else 0,
+        }
+
+    def _get_child_content_version(self, child):
+        """
+        Version of the content a child problem is rendered from.
+
+        Made of its last edit, the library version children were synced from, which changes on every library
+        sync, and the problem seed, as randomized problems are rendered differently for each seed.
+        """
+        return (
+            str(getattr(child, 'edited_on', None)),
+            str(getattr(self, 'source_library_version', None)),
+            getattr(child, 'seed', None),
+        )
+
+    @staticmethod
+    def _get_answer_correctness(child):
+        """
+        Get correctness of the user answers of a child problem, keyed by answer id.
+        """
+        lcp = child.lcp
+        # Check is_correct after lcp is initialized
+        is_correct = child.is_correct()
+        return {str(answer_id): is_correct for answer_id in lcp.student_answers}
+
+    def _get_question_answers(self, child, correctness):
+        """
+        Get list of questions and correct answers of a child problem along with user response.
+
+        Correctness of each answer is given, as persisted in test results. Question labels and correct answer
+        text only depend on the problem content, they are cached for all learners in QUESTION_TEXT_CACHE. Only
+        the user answer and message are computed for each user.
+        """
+        lcp = child.lcp
+        correct_map = lcp.correct_map
+        content_key = (str(child.usage_key), *self._get_child_content_version(child))
+        cache_keys = {answer_id: (*content_key, str(answer_id)) for answer_id in lcp.student_answers}
+        question_texts = QUESTION_TEXT_CACHE.get_many(list(cache_keys.values()))
+        new_question_texts = {
+            cache_key: (lcp.find_question_label(answer_id), lcp.find_correct_answer_text(answer_id))
+            for answer_id, cache_key in cache_keys.items()
+            if cache_key not in question_texts
+        }
+        QUESTION_TEXT_CACHE.set_many(new_question_texts)
+        question_texts.update(new_question_texts)
+        return [
+            QuestionAnswer(
+                question=question_texts[cache_keys[answer_id]][0],
+                answer=lcp.find_answer_text(answer_id, current_answer=student_answer),
+                correct_answer=question_texts[cache_keys[answer_id]][1],
+                is_correct=correctness.get(str(answer_id), False),
+                msg=correct_map.get_msg(answer_id),
+            )
+            for answer_id, student_answer in lcp.student_answers.items()
+        ]
+
+    def _load_problem_children(self):
+        """
+        Load selected child problems, skipping the ones that cannot be loaded.
+        """
+        return [
+            child
+            for _index, _block_type, child in self._children_iterator(filter_block_type='problem')
+            if child is not None
+        ]
+
+    def _child_snapshots(self, include_correctness=False, children=None):
+        """
+        Yield snapshot of each child problem, loading them once if they are not given.
+
+        A snapshot holds the child usage id, its problem_stats entry and, if `include_correctness` is set,
+        correctness of its user answers.
+        """
+        if children is None:
+            children = self._load_problem_children()
+        for child in children:
+            correctness = {}
+            if include_correctness and hasattr(child, 'lcp'):
+                # Fetch correctness first, score is updated while lcp is initialized.
+                correctness = self._get_answer_correctness(child)
+            yield ChildSnapshot(
+                usage_id=str(child.usage_key),
+                stats=self._get_child_stats(child),
+                correctness=correctness,
+            )
+
+    def _rebuild_problem_stats(self, snapshots=None):
+        """
+        Rebuild problem_stats summary from child snapshots, loading all child problems if they are not given.
+        """
+        if snapshots is None:
+            snapshots = self._child_snapshots()
+        return self._set_problem_stats({snapshot.usage_id: snapshot.stats for snapshot in snapshots})
+
+    def _set_problem_stats(self, problem_stats):
+        """
+        Set problem_stats summary.
+
+        The field is only written when its value changes, as assigning it always marks it dirty on a fresh block
+        instance and the runtime would save user state on every request.
+        """
+        if problem_stats != self.problem_stats:
+            self.problem_stats = problem_stats
+        return self.problem_stats
+
+    def _is_problem_stats_stale(self):
+        """
+        Check whether problem_stats is missing or does not match currently selected children.
+        """
+        return not self.problem_stats or set(self.problem_stats) != set(self._problem_usage_keys())
+
+    def _update_problem_stats(self, usage_id=None):
+        """
+        Update problem_stats entry of the given child problem.
+
+        Falls back to a full rebuild if the summary is missing or stale, or if `usage_id` is not given.
+        """
+        usage_keys = self._problem_usage_keys()
+        if usage_id not in usage_keys or self._is_problem_stats_stale():
+            return self._rebuild_problem_stats()
+        problem_stats = dict(self.problem_stats)
+        current_metrics().count('children_loaded')
+        problem_stats[usage_id] = self._get_child_stats(self.runtime.get_block(usage_keys[usage_id]))
+        return self._set_problem_stats(problem_stats)
+
     def _get_problem_stats(self):
         """
         Get completed_problems and total_problems in the current test.
         """
-        total_problems = 0
-        completed_problems = 0
-        for _index, _block_type, child in self._children_iterator(filter_block_type='problem'):
-            if hasattr(child, 'is_submitted'):
-                total_problems += 1
-                if child.is_submitted():
-                    completed_problems += 1
-        return completed_problems, total_problems
+        problem_stats = self._rebuild_problem_stats() if self._is_problem_stats_stale() else self.problem_stats
+        return self._summarize_problem_stats(problem_stats)[:2]
+
+    @staticmethod
+    def _summarize_problem_stats(problem_stats):
+        """
+        Get completed_problems, total_problems, earned and possible score from problem_stats.
+        """
+        completed_problems = total_problems = earned = possible = 0
+        for stats in problem_stats.values():
+            if stats is None:
+                continue
+            total_problems += 1
+            if stats['submitted']:
+                completed_problems += 1
+            earned += stats['earned']
+            possible += stats['possible']
+        return completed_problems, total_problems, earned, possible
+
+    def _calculate_completion(self, completed_problems, total_problems, earned, possible):
+        """
+        Calculate block completion from problem stats.
+        """
+        completion = self._calculate_progress_percentage(completed_problems, total_problems) / 100
+        if completion == 1 and earned < self.cut_off_score * possible:
+            # Reserve 10% if user score is less than self.cut_off_score
+            completion = 0.9
+        return completion
 
     @XBlock.handler
-    def get_overall_progress(self, _data, _suffix=None):
+    @instrumented('get_overall_progress')
+    def get_overall_progress(self, request, _suffix=None):
         """
         Fetch status of all child problem xblocks to get overall progress and updates completion percentage.
+
+        If `usage_id` of the updated child problem is passed, only its entry in problem_stats is refreshed.
         """
-        completed_problems, total_problems = self._get_problem_stats()
-        progress = self._calculate_progress_percentage(completed_problems, total_problems)
-        completion = progress / 100
-        if completion == 1:
-            _, student_score, total_possible_score = self._prepare_user_score()
-            if student_score / total_possible_score < self.cut_off_score:
-                # Reserve 10% if user score is less than self.cut_off_score
-                completion = 0.9
-        self.publish_completion(completion)
+        self._update_problem_stats(request.GET.get('usage_id'))
+        self._precompute_test_results()
+        summary = self._summarize_problem_stats(self.problem_stats)
+        progress = self._calculate_progress_percentage(*summary[:2])
+        self.publish_completion(self._calculate_completion(*summary))
         return Response(json.dumps({'overall_progress': progress}))
 
-    def _prepare_user_score(self, include_question_answers=False):
+    def _get_state_etag(self):
         """
-        Calculate total user score and prepare list of question answers with user response.
+        ETag of the block state returned by `get_state`, derived from the user attempt state.
+        """
+        return self._fingerprint(
+            sorted(self.problem_stats.items()),
+            self.current_slide,
+            self.display_feedback,
+            self.cut_off_score,
+        )
+
+    @XBlock.handler
+    @instrumented('get_state')
+    def get_state(self, request, _suffix=None):
+        """
+        Get overall progress, completion, test results availability, current slide and pass status of the user.
+
+        If `usage_id` of the updated child problem is passed, only its entry in problem_stats is refreshed.
+        Responds with 304 if the state matches the ETag sent in `If-None-Match` header.
+        """
+        usage_id = request.GET.get('usage_id')
+        if usage_id or self._is_problem_stats_stale():
+            self._update_problem_stats(usage_id)
+            self._precompute_test_results()
+        etag = self._get_state_etag()
+        if etag in request.if_none_match:
+            return Response(status=304, etag=etag, cache_control='private, no-cache')
+
+        completed_problems, total_problems, earned, possible = self._summarize_problem_stats(self.problem_stats)
+        completion = self._calculate_completion(completed_problems, total_problems, earned, possible)
+        self.publish_completion(completion)
+        all_completed = completed_problems == total_problems
+        state = {
+            'overall_progress': self._calculate_progress_percentage(completed_problems, total_problems),
+            'completion': completion,
+            'results_available': all_completed and self.display_feedback != DISPLAYFEEDBACK.NEVER,
+            'current_slide': self.current_slide,
+            'passed': all_completed and earned >= self.cut_off_score * possible,
+        }
+        return Response(
+            json.dumps(state),
+            content_type='application/json',
+            charset='utf8',
+            etag=etag,
+            cache_control='private, no-cache',
+        )
+
+    def _prepare_user_score(self, include_correctness=False, children=None):
+        """
+        Calculate total user score and correctness of the user answers of each child problem.
+
+        Children are loaded once if they are not given, and problem_stats is refreshed with their current state.
+        Score only reads persisted child fields, LoncapaProblem of children is only built to include correctness.
 
         Args:
-            include_question_answers (bool): Includes question and correct answers with user response.
-        """
-        question_answers = []
-        student_score = 0
-        total_possible_score = 0
-        for _index, _block_type, child in self._children_iterator(filter_block_type='problem'):
-            lcp = child.lcp
-            correct_map = lcp.correct_map
-            for answer_id, student_answer in lcp.student_answers.items():
-                # Check is_correct before fetching score as lcp is initialized here
-                is_correct = child.is_correct()
-                score = child.score
-                student_score += score.raw_earned
-                total_possible_score += score.raw_possible
-                if include_question_answers:
-                    question_answers.append(
-                        {
-                            'question': lcp.find_question_label(answer_id),
-                            'answer': lcp.find_answer_text(answer_id, current_answer=student_answer),
-                            'correct_answer': lcp.find_correct_answer_text(answer_id),
-                            'is_correct': is_correct,
-                            'msg': correct_map.get_msg(answer_id),
-                        }
-                    )
-        return question_answers, student_score, total_possible_score
+            include_correctness (bool): Includes correctness of user answers, keyed by child usage id.
+            children (list): Selected child problems, if already loaded.
+        """
+        snapshots = list(self._child_snapshots(include_correctness=include_correctness, children=children))
+        problem_stats = self._rebuild_problem_stats(snapshots)
+        _completed, _total, student_score, total_possible_score = self._summarize_problem_stats(problem_stats)
+        correctness = {snapshot.usage_id: snapshot.correctness for snapshot in snapshots if snapshot.correctness}
+        return correctness, student_score, total_possible_score
 
     @XBlock.handler
+    @instrumented('get_test_scores')
     def get_test_scores(self, _data, _suffix):
         """
         Get test score slide content
@@ -278,12 +634,85 @@ class MultiProblemBlock(LibraryContentBlock):
         if self.display_feedback == DISPLAYFEEDBACK.NEVER:
             return Response(_('Not allowed to see results'), 400)
         completed_problems, total_problems = self._get_problem_stats()
+        if completed_problems != total_problems:
+            # Confirm using current child state in case the summary missed a submission.
+            completed_problems, total_problems = self._summarize_problem_stats(self._rebuild_problem_stats())[:2]
         if completed_problems != total_problems and total_problems > 0:
             return Response(_('All problems need to be completed before checking test results!'), status=400)
-        question_answers, student_score, total_possible_score = self._prepare_user_score(include_question_answers=True)
-        passed = False
-        allow_back_button = True
 
+        cache_key = self._get_test_results_cache_key()
+        cached_results = TEST_RESULTS_CACHE.get(cache_key)
+        if cached_results and cached_results[0] == self._get_test_results_fingerprint():
+            test_results = self._get_test_results()
+            template = cached_results[1]
+        else:
+            # Children are loaded once, to compute test results if needed and to render question answers.
+            children = self._load_problem_children()
+            test_results = self._get_test_results(children)
+            template = self._render_test_results(test_results, children)
+            TEST_RESULTS_CACHE.set(cache_key, (self._get_test_results_fingerprint(), template))
+
+        if test_results['passed']:
+            self.publish_completion(1)
+        if self.display_feedback != DISPLAYFEEDBACK.IMMEDIATELY:
+            self.current_slide = -1
+        return Response(template, content_type='text/html')
+
+    def _get_test_results_state_fingerprint(self):
+        """
+        Fingerprint of the user attempt state and cut-off score that persisted test results depend on.
+        """
+        return self._fingerprint(sorted(self.problem_stats.items()), self.cut_off_score)
+
+    def _compute_test_results(self, children=None):
+        """
+        Compute score summary and answers correctness of the user from current child state, and persist them.
+
+        Question and answer text is not persisted, it is looked up when results are rendered, so that user state
+        stays small and text follows content changes.
+        """
+        correctness, earned, possible = self._prepare_user_score(include_correctness=True, children=children)
+        # Fingerprint is computed after problem_stats is refreshed from current child state.
+        self.test_results = {
+            'fingerprint': self._get_test_results_state_fingerprint(),
+            'earned': earned,
+            'possible': possible,
+            'passed': earned >= self.cut_off_score * possible,
+            'correctness': correctness,
+        }
+        return self.test_results
+
+    def _get_test_results(self, children=None):
+        """
+        Get persisted test results of the user, computed again if the attempt state changed since.
+        """
+        if self.test_results.get('fingerprint') == self._get_test_results_state_fingerprint():
+            return self.test_results
+        return self._compute_test_results(children)
+
+    def _precompute_test_results(self):
+        """
+        Compute test results as soon as the last problem is submitted, so that `get_test_scores` only renders them.
+        """
+        if self.display_feedback == DISPLAYFEEDBACK.NEVER:
+            return
+        completed_problems, total_problems = self._get_problem_stats()
+        if total_problems and completed_problems == total_problems:
+            self._get_test_results()
+
+    def _render_test_results(self, test_results, children):
+        """
+        Render test score slide from test results of the user, with question answers of the given child problems.
+        """
+        question_answers = [
+            question_answer
+            for child in children
+            if hasattr(child, 'lcp')
+            for question_answer in self._get_question_answers(
+                child, test_results['correctness'].get(str(child.usage_key), {})
+            )
+        ]
+        student_score, total_possible_score = test_results['earned'], test_results['possible']
         if self.score_display_format == SCORE_DISPLAY_FORMAT.X_OUT_OF_Y:
             score_display = f'{student_score}/{total_possible_score}'
             cut_off_score = f'{math.ceil(self.cut_off_score * total_possible_score)}/{total_possible_score}'
@@ -291,76 +720,292 @@ class MultiProblemBlock(LibraryContentBlock):
             score_display = f'{(student_score / total_possible_score):.0%}'
             cut_off_score = f'{self.cut_off_score:.0%}'
 
-        if (student_score / total_possible_score) >= self.cut_off_score:
-            self.publish_completion(1)
-            passed = True
+        with current_metrics().timer('template_render'):
+            template = render_django_template(
+                loader,
+                '/templates/html/multi_problem_xblock_test_scores.html',
+                {
+                    'cut_off_score': cut_off_score if self.cut_off_score else '',
+                    'question_answers': question_answers,
+                    'score': score_display,
+                    'passed': test_results['passed'],
+                    'allow_back_button': self.display_feedback == DISPLAYFEEDBACK.IMMEDIATELY,
+                },
+            )
+        return template
 
-        if self.display_feedback != DISPLAYFEEDBACK.IMMEDIATELY:
-            allow_back_button = False
-            self.current_slide = -1
+    def _get_test_results_cache_key(self):
+        """
+        Key of cached test results of the current user.
+        """
+        return (str(self.usage_key), self.scope_ids.user_id)
 
-        template = loader.render_django_template(
-            '/templates/html/multi_problem_xblock_test_scores.html',
-            {
-                'cut_off_score': cut_off_score if self.cut_off_score else '',
-                'question_answers': question_answers,
-                'score': score_display,
-                'passed': passed,
-                'allow_back_button': allow_back_button,
-            },
+    def _get_test_results_fingerprint(self):
+        """
+        Fingerprint of the user attempt state and block settings that the rendered test results depend on.
+        """
+        return self._fingerprint(
+            sorted(self.problem_stats.items()),
+            self.display_feedback,
+            self.score_display_format,
+            self.cut_off_score,
+            translation.get_language(),
         )
-        return Response(template, content_type='text/html')
+
+    @staticmethod
+    def _fingerprint(*values):
+        """
+        Hash of JSON representation of the given values.
+        """
+        return hashlib.sha1(json.dumps(values, default=str).encode('utf-8')).hexdigest()
 
     @XBlock.handler
+    @instrumented('reset_selected_children')
     def reset_selected_children(self, data, suffix=None):
+        """
+        Reset selected children and the user progress.
+        """
         # reset current_slide field
         self.current_slide = 0
+        # problem_stats is rebuilt for the newly selected children
+        self.problem_stats = {}
+        self.test_results = {}
+        TEST_RESULTS_CACHE.delete(self._get_test_results_cache_key())
         return super().reset_selected_children(data, suffix)
 
+    def _user_is_staff(self):
+        """
+        Check whether the current user is global staff or has a staff role in the course.
+        """
+        user_service = self.runtime.service(self, 'user')
+        if not user_service:
+            return False
+        opt_attrs = user_service.get_current_user().opt_attrs
+        return bool(opt_attrs.get('edx-platform.user_is_staff')) or (
+            opt_attrs.get('edx-platform.user_role') in ('staff', 'instructor')
+        )
+
+    @XBlock.handler
+    def get_analytics(self, request, _suffix=None):
+        """
+        Get score analytics of all learners of the block, available to course staff.
+
+        Returns aggregated results as JSON, or streams the results of each learner as CSV with `format=csv`.
+        """
+        if not self._user_is_staff():
+            return Response(_('Only course staff can see analytics'), status=403)
+        user_state_client = self._get_user_state_client()
+        if user_state_client is None:
+            return Response(_('Learner state is not available'), status=501)
+        states = user_state_client.iter_all_for_block(self.usage_key, scope=Scope.user_state)
+        analytics = ScoreAnalytics(
+            self.cut_off_score,
+            chunk_size=self._get_xblock_setting('ANALYTICS_CHUNK_SIZE', 1000),
+            user_state_client=user_state_client,
+            course_key=self.usage_key.course_key,
+        )
+        if request.GET.get('format') == 'csv':
+            return Response(
+                app_iter=iter_csv_lines(analytics.process(states)),
+                content_type='text/csv',
+                charset='utf8',
+                content_disposition=f'attachment; filename="{self.usage_key.block_id}_scores.csv"',
+            )
+        for _row in analytics.process(states):
+            pass
+        return Response(json.dumps(analytics.summary()), content_type='application/json', charset='utf8')
+
+    def _get_user_state_client(self):
+        """
+        Get client reading and writing state of all users, `None` if it is not available.
+        """
+        return self.runtime.service(self, 'user_state_client') or getUserStateClient()
+
+    @XBlock.json_handler
+    def bulk_reset_selected_children(self, data, suffix=None):
+        """
+        Reset selected children, child problem state and current slide of a batch of learners, for course staff.
+
+        Expects list of `usernames`, and the `offset` of the batch returned by the previous call to resume the reset.
+        Returns progress of the reset, see `reset_learners`. In the LMS, child problems are reset with their scores
+        and grades, like with the "Reset student attempts" instructor action.
+        """
+        if not self._user_is_staff():
+            raise JsonHandlerError(403, _('Only course staff can reset learners'))
+        user_state_client = self._get_user_state_client()
+        if user_state_client is None:
+            raise JsonHandlerError(501, _('Learner state is not available'))
+        usernames = data.get('usernames')
+        if not isinstance(usernames, list):
+            raise JsonHandlerError(400, _('List of usernames is required'))
+        try:
+            offset = int(data.get('offset', 0))
+        except (TypeError, ValueError):
+            raise JsonHandlerError(400, _('Offset must be a number')) from None
+        return reset_learners(
+            user_state_client,
+            self.usage_key,
+            list(self.children),
+            usernames,
+            offset=max(offset, 0),
+            batch_size=self._get_xblock_setting('BULK_RESET_BATCH_SIZE', 100),
+            reset_child_attempts=self._get_child_attempts_reset(),
+        )
+
+    def _get_child_attempts_reset(self):
+        """
+        Get function resetting state and score of child problems of a learner through edx-platform, so that their
+        grades are updated. `None` outside of the LMS, child state is then only deleted.
+        """
+        reset_student_attempts = getResetStudentAttempts()
+        if reset_student_attempts is None:
+            return None
+        from django.contrib.auth import get_user_model  # pylint: disable=import-outside-toplevel
+
+        user_model = get_user_model()
+        user_id = self.runtime.service(self, 'user').get_current_user().opt_attrs.get('edx-platform.user_id')
+        requesting_user = user_model.objects.get(id=user_id)
+        course_id = self.usage_key.course_key
+
+        def reset_child_attempts(username, child_keys):
+            student = user_model.objects.get(username=username)
+            for child_key in child_keys:
+                reset_student_attempts(course_id, student, child_key, requesting_user, delete_module=True)
+
+        return reset_child_attempts
+
+    def _get_child_context(self, context=None):
+        """
+        Prepare context passed to child blocks while rendering them.
+        """
+        child_context = {} if not context else copy(context)
+        if 'username' not in child_context:
+            user_service = self.runtime.service(self, 'user')
+            child_context['username'] = user_service.get_current_user().opt_attrs.get('edx-platform.username')
+        return child_context
+
+    def _is_lazy_slide(self, index):
+        """
+        Check whether the slide at `index` should be rendered as a placeholder and loaded on demand.
+
+        Only the current slide and `LAZY_SLIDE_PRELOAD_NEIGHBOURS` slides around it are rendered server-side
+        when `LAZY_SLIDE_RENDERING` is enabled in XBLOCK_SETTINGS.
+        """
+        if not self._get_xblock_setting('LAZY_SLIDE_RENDERING', False):
+            return False
+        if self.current_slide == -1:
+            # Test results are displayed instead of problem slides.
+            return True
+        neighbours = self._get_xblock_setting('LAZY_SLIDE_PRELOAD_NEIGHBOURS', 1)
+        return abs(index - self.current_slide) > neighbours
+
+    def _get_bookmarked_usage_ids(self, bookmarks_service, usage_keys):
+        """
+        Get set of bookmarked usage ids among the given usage keys.
+
+        Fetches all bookmarks of the learner in the course with a single call if the bookmarks service supports
+        listing them, otherwise checks each usage key separately.
+        """
+        if not bookmarks_service or not usage_keys:
+            return set()
+        if hasattr(bookmarks_service, 'bookmarks'):
+            usage_ids = {str(usage_key) for usage_key in usage_keys}
+            bookmarks = bookmarks_service.bookmarks(course_key=self.usage_key.course_key)
+            return {bookmark['usage_id'] for bookmark in bookmarks if bookmark['usage_id'] in usage_ids}
+        return {
+            str(usage_key) for usage_key in usage_keys if bookmarks_service.is_bookmarked(usage_key=usage_key)
+        }
+
+    def _render_children(self, children, child_context):
+        """
+        Render student view of the given children, returned in the same order.
+
+        Children are rendered by a pool of `RENDER_WORKERS` threads if set in XBLOCK_SETTINGS, only useful if
+        the runtime and child blocks are thread-safe.
+        """
+        current_metrics().count('child_renders', len(children))
+        student_view = getStudentView()
+        workers = min(self._get_xblock_setting('RENDER_WORKERS', 1), len(children))
+        if workers <= 1:
+            return [child.render(student_view, child_context) for child in children]
+
+        # Pool threads do not inherit the request thread state: active language, crum current request and user
+        # used by edx-platform services, and context variables such as the metrics recorder.
+        language = translation.get_language()
+        request = crum.get_current_request() if crum else None
+        user = crum.get_current_user() if crum else None
+        context = contextvars.copy_context()
+
+        def render(child):
+            if crum:
+                crum.set_current_request(request)
+                crum.set_current_user(user)
+            try:
+                with translation.override(language):
+                    return child.render(student_view, child_context)
+            finally:
+                if crum:
+                    crum.set_current_request(None)
+                # Database connections are per thread and pool threads are discarded after the request, so close
+                # the ones opened by this worker even if they are persistent (CONN_MAX_AGE).
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # A context can only be entered by one thread at a time, each render runs in its own copy.
+            return list(executor.map(lambda child: context.copy().run(render, child), children))
+
     def student_view_context(self, context=None):
         """
         Student view data for templates and javascript initialization
         """
         fragment = Fragment()
         items = []
-        child_context = {} if not context else copy(context)
+        child_context = self._get_child_context(context)
         jump_to_id = child_context.get('jumpToId')
         bookmarks_service = self.runtime.service(self, 'bookmarks')
-        total_problems = 0
-        completed_problems = 0
-
-        if 'username' not in child_context:
-            user_service = self.runtime.service(self, 'user')
-            child_context['username'] = user_service.get_current_user().opt_attrs.get('edx-platform.username')
+        problem_stats = {}
+        # Children of the same type share their resources, which are added to the fragment only once.
+        seen_resources = set()
 
+        children = []
         for index, block_type, child in self._children_iterator():
-            child_id = str(child.usage_key)
             if child is None:
                 # https://github.com/openedx/edx-platform/blob/448acc95f6296c72097102441adc4e1f79a7444f/xmodule/library_content_block.py#L391-L396
                 logger.error('Skipping display for child block that is None')
                 continue
-            if jump_to_id == child_id:
+            if jump_to_id == str(child.usage_key):
                 self.current_slide = index
+            children.append((index, block_type, child))
+        bookmarked_usage_ids = self._get_bookmarked_usage_ids(
+            bookmarks_service, [child.usage_key for _index, _block_type, child in children]
+        )
+        rendered_items = []
 
-            if block_type == 'problem' and hasattr(child, 'is_submitted'):
+        for index, block_type, child in children:
+            child_id = str(child.usage_key)
+            if block_type == 'problem':
                 # set current progress on first load
-                total_problems += 1
-                if child.is_submitted():
-                    completed_problems += 1
+                problem_stats[child_id] = self._get_child_stats(child)
 
-            rendered_child = child.render(STUDENT_VIEW, child_context)
-            fragment.add_fragment_resources(rendered_child)
-            items.append(
-                {
-                    'id': child_id,
-                    'content': rendered_child.content,
-                    'bookmark_id': '{},{}'.format(child_context['username'], child_id),
-                    'is_bookmarked': (
-                        bookmarks_service.is_bookmarked(usage_key=child.usage_key) if bookmarks_service else False
-                    ),
-                }
+            item = SlideItem(
+                id=child_id,
+                index=index,
+                content='',
+                is_lazy=self._is_lazy_slide(index),
+                bookmark_id='{},{}'.format(child_context['username'], child_id),
+                is_bookmarked=child_id in bookmarked_usage_ids,
             )
+            if not item.is_lazy:
+                rendered_items.append((item, child))
+            items.append(item)
+
+        rendered_children = self._render_children([child for _item, child in rendered_items], child_context)
+        for (item, _child), rendered_child in zip(rendered_items, rendered_children):
+            add_unique_fragment_resources(fragment, rendered_child, seen_resources)
+            item.content = rendered_child.content
 
+        self._set_problem_stats(problem_stats)
+        completed_problems, total_problems = self._summarize_problem_stats(problem_stats)[:2]
         next_page_on_submit = self.next_page_on_submit and self.display_feedback != DISPLAYFEEDBACK.IMMEDIATELY
         overall_progress = self._calculate_progress_percentage(completed_problems, total_problems)
 
@@ -385,14 +1030,69 @@ class MultiProblemBlock(LibraryContentBlock):
         }
         return fragment, template_context, js_context
 
+    @XBlock.json_handler
+    @instrumented('render_slide')
+    def render_slide(self, data, suffix=None):
+        """
+        Render a single slide on demand, used to load slides that were rendered as placeholders.
+
+        Returns the child fragment (html + resources) for the slide at the given `index`.
+        """
+        try:
+            index = int(data.get('index'))
+        except (TypeError, ValueError):
+            raise JsonHandlerError(400, _('Slide index is required')) from None
+        selected_children = list(self.selected_children())
+        if not 0 <= index < len(selected_children):
+            raise JsonHandlerError(404, _('Slide not found'))
+        block_type, block_id = selected_children[index]
+        metrics = current_metrics()
+        metrics.count('children_loaded')
+        child = self.runtime.get_block(self.usage_key.course_key.make_usage_key(block_type, block_id))
+        if child is None:
+            raise JsonHandlerError(404, _('Slide not found'))
+        metrics.count('child_renders')
+        rendered_child = child.render(getStudentView(), self._get_child_context())
+        return {
+            'index': index,
+            'id': str(child.usage_key),
+            **rendered_child.to_dict(),
+        }
+
+    @staticmethod
+    def _render_content(template_context):
+        """
+        Render student view HTML, assembling slides one by one into the layout.
+
+        Slides are rendered separately and joined once with the layout around them. Content of each child is
+        released as soon as its slide is rendered, so that slide HTML is not held in several copies at once.
+        """
+        layout = render_django_template(
+            loader, '/templates/html/multi_problem_xblock.html', {**template_context, 'slides_marker': SLIDES_MARKER}
+        )
+        # The marker is absent when slides are not displayed, autoescaping prevents fields from containing it.
+        head, marker, tail = layout.partition(SLIDES_MARKER)
+        del layout
+        parts = [head]
+        for counter, item in enumerate(template_context['items']):
+            if marker and (item.content or item.is_lazy):
+                parts.append(render_django_template(loader, '/templates/html/multi_problem_xblock_slide.html', {
+                    'item': item,
+                    'counter': counter,
+                    'bookmarks_service_enabled': template_context['bookmarks_service_enabled'],
+                }))
+            item.content = ''
+        parts.append(tail)
+        return ''.join(parts)
+
+    @instrumented('student_view')
     def student_view(self, context):
         """
         Student view
         """
         fragment, template_context, js_context = self.student_view_context(context)
-        fragment.add_content(
-            loader.render_django_template('/templates/html/multi_problem_xblock.html', template_context)
-        )
+        with current_metrics().timer('template_render'):
+            fragment.add_content(self._render_content(template_context))
         fragment.add_css_url(self.runtime.local_resource_url(self, 'public/css/multi_problem_xblock.css'))
         fragment.add_javascript_url(self.runtime.local_resource_url(self, 'public/js/multi_problem_xblock.js'))
         fragment.initialize_js('MultiProblemBlock', js_context)
@@ -401,33 +1101,78 @@ class MultiProblemBlock(LibraryContentBlock):
     def publish_completion(self, progress: float):
         """
         Update block completion status.
+
+        The event is only published if the value differs from the last published one.
         """
         completion_service = self.runtime.service(self, 'completion')
         if completion_service and completion_service.completion_tracking_enabled():
+            if progress == self.published_completion:
+                COMPLETION_PUBLISH_STATS['suppressed'] += 1
+                get_metrics_backend().increment('completion.suppressed')
+                return
             self.runtime.publish(self, 'completion', {'completion': progress})
+            self.published_completion = progress
+            COMPLETION_PUBLISH_STATS['emitted'] += 1
+            get_metrics_backend().increment('completion.emitted')
+
+    @staticmethod
+    def _process_child_xml(system, child):
+        """
+        Import a child node, returns its usage id (None if it cannot be loaded) and time taken in seconds.
+        """
+        from lxml import etree  # pylint: disable=import-outside-toplevel
+
+        start_time = time.perf_counter()
+        try:
+            usage_id = system.process_xml(etree.tostring(child)).scope_ids.usage_id
+        except (etree.XMLSyntaxError, AttributeError):
+            usage_id = None
+        return usage_id, time.perf_counter() - start_time
 
     @classmethod
     def definition_from_xml(cls, xml_object, system):
-        """Generate object from xml"""
-        children = []
+        """
+        Generate object from xml
 
-        for child in xml_object.getchildren():
-            try:
-                children.append(system.process_xml(etree.tostring(child)).scope_ids.usage_id)
-            except (XMLSyntaxError, AttributeError):
+        Children are imported by a pool of `IMPORT_WORKERS` threads if set in XBLOCK_SETTINGS.
+        """
+        start_time = time.perf_counter()
+        # Comments and processing instructions are not blocks, skip them without serializing them.
+        child_nodes = [child for child in xml_object.iterchildren() if isinstance(child.tag, str)]
+        workers = min(get_xblock_settings().get('IMPORT_WORKERS', 1), len(child_nodes))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(partial(cls._process_child_xml, system), child_nodes))
+        else:
+            results = [cls._process_child_xml(system, child) for child in child_nodes]
+
+        children = []
+        for child, (usage_id, duration) in zip(child_nodes, results):
+            if usage_id is None:
                 msg = (
-                    'Unable to load child when parsing Multi Problem Block. '
-                    'This can happen when a comment is manually added to the course export.'
+                    f'Unable to load {child.tag} child with url_name "{child.get("url_name")}" '
+                    'when parsing Multi Problem Block.'
                 )
                 logger.error(msg)
                 if system.error_tracker is not None:
                     system.error_tracker(msg)
+                continue
+            logger.debug('Loaded child %s of Multi Problem Block in %.3fs', usage_id, duration)
+            children.append(usage_id)
 
+        logger.info(
+            'Loaded %d of %d children of Multi Problem Block in %.3fs',
+            len(children),
+            len(child_nodes),
+            time.perf_counter() - start_time,
+        )
         definition = dict(xml_object.attrib.items())
         return definition, children
 
     def definition_to_xml(self, resource_fs):
         """Exports Library Content Block to XML"""
+        from lxml import etree  # pylint: disable=import-outside-toplevel
+
         xml_object = etree.Element('multi_problem')
         for child in self.get_children():
             self.runtime.add_block_as_child_node(child, xml_object)
@@ -22,9 +22,90 @@ function MultiProblemBlock(runtime, element, initArgs) {
     next_page_on_submit: nextPageOnSubmit = false,
   } = initArgs;
 
+  var requestIdle = window.requestIdleCallback || function(callback) { return setTimeout(callback, 1); };
+  var slideRequests = {};
+  var loadedResources = {};
+
+  /**
+   * Load a single fragment resource (css/js) once per page.
+   * @param {Object} resource - fragment resource as returned by `Fragment.to_dict`
+   */
+  function loadResource(resource) {
+    var key = resource.kind + ':' + resource.mimetype + ':' + resource.data;
+    if (loadedResources[key]) {
+      return loadedResources[key];
+    }
+    var request = $.Deferred().resolve();
+    if (resource.kind === 'url') {
+      if (resource.mimetype === 'text/css' && !$('link[href="' + resource.data + '"]').length) {
+        $('head').append($('<link>', { rel: 'stylesheet', type: 'text/css', href: resource.data }));
+      } else if (resource.mimetype === 'application/javascript' && !$('script[src="' + resource.data + '"]').length) {
+        request = $.ajax({ url: resource.data, dataType: 'script', cache: true });
+      }
+    } else if (resource.mimetype === 'text/css') {
+      $('head').append($('<style>').text(resource.data));
+    } else if (resource.mimetype === 'application/javascript') {
+      $.globalEval(resource.data);
+    } else if (resource.mimetype === 'text/html') {
+      $(resource.placement === 'head' ? 'head' : 'body').append(resource.data);
+    }
+    loadedResources[key] = request;
+    return request;
+  }
+
+  /**
+   * Load resources sequentially so that scripts are evaluated in their original order.
+   * @param {Array} resources
+   */
+  function loadResources(resources) {
+    return resources.reduce(function(previous, resource) {
+      return previous.then(function() { return loadResource(resource); });
+    }, $.Deferred().resolve());
+  }
+
+  /**
+   * Render a placeholder slide using `render_slide` handler.
+   * @param {number} num - slide position
+   */
+  function loadSlide(num) {
+    var $slide = $($('.slide', element)[num]);
+    var $placeholder = $slide.children('.slide-placeholder');
+    if (!$placeholder.length) {
+      return $.Deferred().resolve();
+    }
+    if (!slideRequests[num]) {
+      slideRequests[num] = $.post({
+        url: runtime.handlerUrl(element, 'render_slide'),
+        data: JSON.stringify({ index: $slide.data('index') }),
+      }).then(function(data) {
+        return loadResources(data.resources).then(function() {
+          var $content = $(data.content);
+          $placeholder.replaceWith($content);
+          $content.filter('.xblock').add($content.find('.xblock')).each(function(i, child) {
+            XBlock.initializeBlock(child);
+          });
+        });
+      }).fail(function() {
+        delete slideRequests[num];
+      });
+    }
+    return slideRequests[num];
+  }
+
+  /**
+   * Load next slide when the browser is idle.
+   * @param {number} num - slide position
+   */
+  function prefetchSlide(num) {
+    if (num < $('.slide', element).length) {
+      requestIdle(function() { loadSlide(num); });
+    }
+  }
+
   function showSlide(num) {
     var slides = $('.slide', element);
     slides[num].style.display = "block";
+    loadSlide(num).then(function() { prefetchSlide(num + 1); });
     //... and fix the Previous/Next buttons:
     if (num == 0) {
       $(".prevBtn", element).prop('disabled', true);
@@ -40,14 +121,73 @@ function MultiProblemBlock(runtime, element, initArgs) {
     updateStepIndicator(num, slides.length)
   }
 
+  // Delay before the slide position is saved, rapid navigation is coalesced into a single request.
+  var SLIDE_CHANGE_DELAY = 1000;
+  var savedSlide = currentSlide;
+  var pendingSlide = null;
+  var slideChangeTimer = null;
+
+  /**
+   * Save pending slide position if it differs from the last saved one.
+   * @param {boolean} useBeacon - send request using `navigator.sendBeacon`, used when the page is being hidden
+   */
+  function flushSlidePosition(useBeacon) {
+    clearTimeout(slideChangeTimer);
+    if (pendingSlide === null || pendingSlide === savedSlide) {
+      pendingSlide = null;
+      return;
+    }
+    var url = runtime.handlerUrl(element, 'handle_slide_change');
+    var data = JSON.stringify({ current_slide: pendingSlide });
+    if (useBeacon === true && navigator.sendBeacon) {
+      navigator.sendBeacon(url, data);
+    } else {
+      $.post({ url: url, data: data });
+    }
+    savedSlide = pendingSlide;
+    pendingSlide = null;
+  }
+
+  /**
+   * Drop pending slide position without saving it, e.g. when the problems are reset.
+   */
+  function cancelSlidePosition() {
+    clearTimeout(slideChangeTimer);
+    pendingSlide = null;
+  }
+
+  function flushSlidePositionOnHide(event) {
+    if (event.type === 'pagehide' || document.visibilityState === 'hidden') {
+      flushSlidePosition(true);
+    }
+  }
+
+  // The block element is kept on reset, so drop the listeners and pending save of the previous initialization.
+  var previousFlush = $element.data('flushSlidePosition');
+  if (previousFlush) {
+    document.removeEventListener('visibilitychange', previousFlush);
+    window.removeEventListener('pagehide', previousFlush);
+  }
+  var previousCancel = $element.data('cancelSlidePosition');
+  if (previousCancel) {
+    previousCancel();
+  }
+  $element.data('flushSlidePosition', flushSlidePositionOnHide);
+  $element.data('cancelSlidePosition', cancelSlidePosition);
+  document.addEventListener('visibilitychange', flushSlidePositionOnHide);
+  window.addEventListener('pagehide', flushSlidePositionOnHide);
+
+  function saveSlidePosition(num) {
+    pendingSlide = num;
+    clearTimeout(slideChangeTimer);
+    slideChangeTimer = setTimeout(flushSlidePosition, SLIDE_CHANGE_DELAY);
+  }
+
   function updateStepIndicator(num, total) {
     $('.slide-position', element).text(
       gettext('{current_position} of {total}').replace('{current_position}', num + 1).replace('{total}', total)
     );
-    $.post({
-      url: runtime.handlerUrl(element, 'handle_slide_change'),
-      data: JSON.stringify({ current_slide: num }),
-    });
+    saveSlidePosition(num);
   }
 
   function nextPrev(num) {
@@ -80,6 +220,8 @@ function MultiProblemBlock(runtime, element, initArgs) {
     bookmarkButtonHandlers.forEach(function (bookmarkButtonHander) {
       bookmarkButtonHander.removeBookmark();
     });
+    // Position of the previous slides must not be saved for the newly selected children.
+    cancelSlidePosition();
 
     $.post({
       url: runtime.handlerUrl(element, 'reset_selected_children'),
@@ -98,35 +240,36 @@ function MultiProblemBlock(runtime, element, initArgs) {
   $('.problem-reset-btn', element).click(resetProblems.bind(this));
   $('.redo-test', element).click(resetProblems.bind(this));
 
-  var $problems = $(element).find('.problems-wrapper');
   var $progressBar = $(element).find('.progress-bar');
   var $resultsBtn = $(element).find('.see-test-results');
 
-  $problems.each(function() {
-    $(this).on("progressChanged", function() {
-      $.get(runtime.handlerUrl(element, 'get_overall_progress'), function( data ) {
-        $progressBar.css('width', data.overall_progress + '%');
-        $progressBar.attr('aria-valuenow', data.overall_progress);
-        if (data.overall_progress < 100) {
-          $resultsBtn.prop('disabled', true);
-        } else {
-          $resultsBtn.prop('disabled', false);
-        }
-      });
-      // initArgs.nextPageOnSubmit loose value on reset, so confirm value from html template
-      if ((nextPageOnSubmit || $('.multi-problem-container', element).data('nextPageOnSubmit'))) {
-        nextPrev(1);
-      }
+  // Delegate the event so that problems in slides loaded on demand are handled as well.
+  // The block element is kept on reset, so drop the handler bound by the previous initialization.
+  $element.off("progressChanged.multiProblem").on("progressChanged.multiProblem", ".problems-wrapper", function() {
+    // Pass usage id of the updated problem to refresh only its progress.
+    // Unchanged state is answered with 304 by the server and served from the browser cache.
+    var usageId = $(this).closest('.slide').data('id');
+    $.getJSON(runtime.handlerUrl(element, 'get_state'), { usage_id: usageId }, function( data ) {
+      $progressBar.css('width', data.overall_progress + '%');
+      $progressBar.attr('aria-valuenow', data.overall_progress);
+      $resultsBtn.prop('disabled', !data.results_available);
     });
+    // initArgs.nextPageOnSubmit loose value on reset, so confirm value from html template
+    if ((nextPageOnSubmit || $('.multi-problem-container', element).data('nextPageOnSubmit'))) {
+      nextPrev(1);
+    }
   });
 
   $('.see-test-results', element).click((e) => {
     e.preventDefault();
+    // The server moves the learner to the results, a pending slide position must not overwrite it.
+    cancelSlidePosition();
     $.ajax({
       url: runtime.handlerUrl(element, 'get_test_scores'),
       type: 'GET',
       dataType: 'html',
       success: function( data ) {
+        savedSlide = -1;
         $('.problem-test-score-container', element).show();
         $('.problem-test-score-container', element).html(data);
         if ($('.back-to-problems', element).length) {
@@ -0,0 +1,65 @@
+""" Multi Problem XBlock - Compact records of the view and test results data """
+
+
+class Record:
+    """
+    Base of mutable records with fixed attributes.
+
+    Attributes are declared with `__slots__`, so that records are smaller and faster to create than dicts
+    built for each child and answer of every request. Django templates access them as attributes.
+    """
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        attributes = ', '.join(f'{name}={value!r}' for name, value in self.as_dict().items())
+        return f'{type(self).__name__}({attributes})'
+
+    def as_dict(self):
+        """
+        Get attributes of the record as a dict.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SlideItem(Record):
+    """
+    Slide of a child block in the student view.
+    """
+    __slots__ = ('id', 'index', 'content', 'is_lazy', 'bookmark_id', 'is_bookmarked')
+
+    def __init__(self, *, id, index, content, is_lazy, bookmark_id, is_bookmarked):  # pylint: disable=redefined-builtin
+        self.id = id
+        self.index = index
+        self.content = content
+        self.is_lazy = is_lazy
+        self.bookmark_id = bookmark_id
+        self.is_bookmarked = is_bookmarked
+
+
+class ChildSnapshot(Record):
+    """
+    State of a child problem loaded once per request: usage id, problem_stats entry and answers correctness.
+    """
+    __slots__ = ('usage_id', 'stats', 'correctness')
+
+    def __init__(self, usage_id, stats, correctness):
+        self.usage_id = usage_id
+        self.stats = stats
+        self.correctness = correctness
+
+
+class QuestionAnswer(Record):
+    """
+    Question of a child problem with the user answer, displayed in test results.
+    """
+    __slots__ = ('question', 'answer', 'correct_answer', 'is_correct', 'msg')
+
+    def __init__(self, question, answer, correct_answer, is_correct, msg):
+        self.question = question
+        self.answer = answer
+        self.correct_answer = correct_answer
+        self.is_correct = is_correct
+        self.msg = msg
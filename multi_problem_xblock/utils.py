@@ -1,5 +1,16 @@
 """ Multi Problem XBlock - Utils """
 
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.template import Context, Engine, Template
+from django.template.backends.django import get_installed_libraries
+from django.utils import translation
+
 
 def _(text):
     """ Dummy `gettext` replacement to make string extraction tools scrape strings marked for translation """
@@ -14,9 +25,188 @@ def ngettext_fallback(text_singular, text_plural, number):
         return text_plural
 
 
+def get_xblock_settings(block_settings_key='MultiProblemBlock'):
+    """
+    Get XBLOCK_SETTINGS bucket of the block, for code running without a block instance and its settings service.
+    """
+    return getattr(settings, 'XBLOCK_SETTINGS', {}).get(block_settings_key, {})
+
+
 class DummyTranslationService:
     """
     Dummy drop-in replacement for i18n XBlock service
     """
     gettext = _
     ngettext = ngettext_fallback
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache with least recently used eviction and optional time to live (in seconds).
+    """
+
+    def __init__(self, maxsize=128, ttl=None, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Get cached value of `key`, `default` if it is missing or expired.
+        """
+        with self._lock:
+            try:
+                expires_at, value = self._data[key]
+            except KeyError:
+                return default
+            if expires_at is not None and expires_at <= self._timer():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Cache `value` for `key`, evicting least recently used entries above `maxsize`.
+        """
+        expires_at = self._timer() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Remove `key` from the cache.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        with self._lock:
+            self._data.clear()
+
+
+class ContentCache:
+    """
+    Cache of values depending only on course content, shared by all learners.
+
+    Values are kept in a process-wide LRU cache. If the `CONTENT_CACHE` setting names a Django cache, e.g.
+    memcached, they are also shared across processes through it. Keys must be JSON serializable and include
+    the content version, so that stale entries are never read once content changes.
+    """
+
+    def __init__(self, prefix, maxsize=4096):
+        self.prefix = prefix
+        self.local = LRUCache(maxsize=maxsize)
+
+    @staticmethod
+    def _get_backend():
+        """
+        Get the shared Django cache, None if it is not configured.
+        """
+        alias = get_xblock_settings().get('CONTENT_CACHE')
+        if not alias:
+            return None
+        from django.core.cache import caches  # pylint: disable=import-outside-toplevel
+
+        return caches[alias]
+
+    def _backend_key(self, key):
+        # Django cache keys are limited in length and characters, e.g. by memcached.
+        return f'{self.prefix}:{hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()}'
+
+    def get_many(self, keys):
+        """
+        Get cached values of `keys` as a dict, missing keys are left out.
+        """
+        values = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                values[key] = value
+        backend = self._get_backend()
+        if missing and backend is not None:
+            backend_keys = {self._backend_key(key): key for key in missing}
+            for backend_key, value in backend.get_many(list(backend_keys)).items():
+                self.local.set(backend_keys[backend_key], value)
+                values[backend_keys[backend_key]] = value
+        return values
+
+    def set_many(self, values):
+        """
+        Cache the given dict of values.
+        """
+        for key, value in values.items():
+            self.local.set(key, value)
+        backend = self._get_backend()
+        if values and backend is not None:
+            backend.set_many({self._backend_key(key): value for key, value in values.items()})
+
+    def clear(self):
+        """
+        Remove all entries from the process-wide cache, entries of the shared cache expire on their own.
+        """
+        self.local.clear()
+
+
+def add_unique_fragment_resources(fragment, child_fragment, seen_resources):
+    """
+    Add resources of `child_fragment` to `fragment`, skipping the ones already in `seen_resources`.
+
+    Resources are compared by kind, data (URL or content), mimetype and placement, and keep their first
+    occurrence order. `seen_resources` is updated with the added resources.
+    """
+    for resource in child_fragment.resources:
+        if resource not in seen_resources:
+            seen_resources.add(resource)
+            if resource.kind == 'url':
+                fragment.add_resource_url(resource.data, resource.mimetype, resource.placement)
+            else:
+                fragment.add_resource(resource.data, resource.mimetype, resource.placement)
+
+
+# Compiled templates keyed by resource loader package, template path and active language.
+TEMPLATE_CACHE = LRUCache(maxsize=32)
+
+
+def _compile_template(loader, template_path):
+    """
+    Compile template resource with the same engine as `ResourceLoader.render_django_template`.
+    """
+    # xblock.utils.resources -> xblock.utils.templatetags.i18n, same for the legacy xblockutils package
+    loader_package = type(loader).__module__.rpartition('.')[0]
+    libraries = get_installed_libraries()
+    libraries['i18n'] = f'{loader_package}.templatetags.i18n'
+    return Template(loader.load_unicode(template_path), engine=Engine(libraries=libraries))
+
+
+def render_django_template(loader, template_path, context=None, i18n_service=None):
+    """
+    Drop-in replacement of `loader.render_django_template` reusing compiled templates.
+
+    Templates are compiled once per process and language, as translation tags keep per-language state.
+    Set `TEMPLATE_CACHE` to False in XBLOCK_SETTINGS to compile templates on every call during development.
+    """
+    context = context or {}
+    context['_i18n_service'] = i18n_service
+    if not get_xblock_settings().get('TEMPLATE_CACHE', True):
+        return _compile_template(loader, template_path).render(Context(context))
+    cache_key = (loader.module_name, template_path, translation.get_language())
+    template = TEMPLATE_CACHE.get(cache_key)
+    if template is None:
+        template = _compile_template(loader, template_path)
+        TEMPLATE_CACHE.set(cache_key, template)
+    return template.render(Context(context))
@@ -0,0 +1,43 @@
+"""
+Run Multi Problem Block benchmarks.
+
+Usage: python -m tests.benchmarks [--children 1 10 100 1000] [--save baseline.json] [--compare baseline.json]
+
+Exits with status 1 if a regression compared to the baseline is found.
+"""
+import argparse
+import os
+import sys
+
+import django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--children', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs of each benchmark')
+    parser.add_argument('--save', metavar='PATH', help='save results as baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare results with saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown ratio')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'workbench.settings')
+    django.setup()
+    # pylint: disable=import-outside-toplevel
+    from .harness import compare, format_results, load_baseline, save_results
+    from .scenarios import run_benchmarks
+
+    results = run_benchmarks(args.children, repeat=args.repeat)
+    print(format_results(results))
+    if args.save:
+        save_results(results, args.save)
+    if args.compare:
+        regressions = compare(results, load_baseline(args.compare), tolerance=args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
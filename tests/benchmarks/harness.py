@@ -0,0 +1,117 @@
+"""
+Helpers to measure benchmarks and compare results with a saved baseline.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class Measurement:
+    """ Result of a benchmark run with the given number of children """
+    name: str
+    children: int
+    wall_time: float
+    peak_memory: int
+    allocated_blocks: int
+    child_loads: int
+
+    @property
+    def key(self):
+        return f'{self.name}[{self.children}]'
+
+
+def measure(name, children, run, *, setup=None, backend=None, repeat=5):
+    """
+    Measure `run` callable.
+
+    Wall time is the median of `repeat` runs. Allocations (peak traced memory and number of memory blocks
+    allocated) and number of child loads done through `backend` are measured in a separate run, as tracing
+    allocations slows execution down.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start_time = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start_time)
+
+    if setup:
+        setup()
+    child_loads = backend.round_trips if backend else 0
+    tracemalloc.start()
+    try:
+        blocks_before = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        run()
+        blocks_after = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return Measurement(
+        name=name,
+        children=children,
+        wall_time=statistics.median(timings),
+        peak_memory=peak_memory,
+        allocated_blocks=max(blocks_after - blocks_before, 0),
+        child_loads=(backend.round_trips - child_loads) if backend else 0,
+    )
+
+
+def save_results(results, path):
+    """
+    Save measurements as a JSON baseline.
+    """
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump({result.key: asdict(result) for result in results}, baseline_file, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    """
+    Load measurements saved by `save_results`, keyed by `Measurement.key`.
+    """
+    with open(path, encoding='utf-8') as baseline_file:
+        return {key: Measurement(**data) for key, data in json.load(baseline_file).items()}
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compare measurements with baseline ones and return list of regression messages.
+
+    Wall time and peak memory regress if they exceed the baseline by more than `tolerance` (a ratio),
+    child loads regress on any increase.
+    """
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.key)
+        if expected is None:
+            continue
+        if result.wall_time > expected.wall_time * (1 + tolerance):
+            regressions.append(
+                f'{result.key}: wall time {result.wall_time * 1000:.2f} ms, '
+                f'baseline {expected.wall_time * 1000:.2f} ms'
+            )
+        if result.peak_memory > expected.peak_memory * (1 + tolerance):
+            regressions.append(
+                f'{result.key}: peak memory {result.peak_memory} B, baseline {expected.peak_memory} B'
+            )
+        if result.child_loads > expected.child_loads:
+            regressions.append(
+                f'{result.key}: child loads {result.child_loads}, baseline {expected.child_loads}'
+            )
+    return regressions
+
+
+def format_results(results):
+    """
+    Format measurements as a text table.
+    """
+    lines = [f'{"benchmark":<32}{"wall time (ms)":>16}{"peak memory (KiB)":>20}{"alloc blocks":>14}{"loads":>8}']
+    for result in results:
+        lines.append(
+            f'{result.key:<32}{result.wall_time * 1000:>16.2f}{result.peak_memory / 1024:>20.1f}'
+            f'{result.allocated_blocks:>14}{result.child_loads:>8}'
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,63 @@
+"""
+Benchmark of Multi Problem Block package import, which adds to the startup time of every LMS and CMS worker.
+
+Usage: python -m tests.benchmarks.import_time [--repeat 5] [--top 10]
+
+The package is imported in a fresh interpreter with `python -X importtime` on each run.
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+PACKAGE = 'multi_problem_xblock'
+# Slow to import and only needed by some handlers, so they must not be imported with the package.
+DEFERRED_MODULES = ('numpy',)
+
+
+def measure_import(module=PACKAGE):
+    """
+    Import module in a new interpreter, returns (self, cumulative) import time of each imported module in us.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=Path(__file__).resolve().parents[2],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    timings = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_time, cumulative_time, name = line[len('import time:'):].split('|')
+        if self_time.strip().isdigit():
+            timings[name.strip()] = (int(self_time), int(cumulative_time))
+    return timings
+
+
+def benchmark(repeat=5):
+    """
+    Return timings of the run with the fastest package import.
+    """
+    runs = [measure_import() for _ in range(repeat)]
+    return min(runs, key=lambda timings: timings[PACKAGE][1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='number of slowest modules to list')
+    args = parser.parse_args()
+    timings = benchmark(args.repeat)
+    print(f'{PACKAGE:<50} {timings[PACKAGE][1] / 1000:10.2f} ms')
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    for name, (self_time, _cumulative_time) in slowest:
+        print(f'  {name:<48} {self_time / 1000:10.2f} ms (self)')
+    for name in DEFERRED_MODULES:
+        if name in timings:
+            print(f'WARNING {name} is imported with {PACKAGE}')
+
+
+if __name__ == '__main__':
+    main()
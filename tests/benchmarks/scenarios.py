@@ -0,0 +1,121 @@
+"""
+Benchmark scenarios of the Multi Problem Block views, handlers and OLX import/export.
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+from lxml import etree
+from webob import Request
+
+from multi_problem_xblock.compat import L_SHOWANSWER
+from multi_problem_xblock.multi_problem_xblock import TEST_RESULTS_CACHE, MultiProblemBlock
+
+from ..utils import CountingBlockBackend, SampleProblemBlock, instantiate_block, make_request
+from .harness import measure
+from .xml_import import FakeImportSystem, make_export
+
+
+class FakeLoncapaProblem:
+    """ Lightweight replacement of capa LoncapaProblem """
+    student_answers = {'answer_1': 'choice_1'}
+    correct_map = SimpleNamespace(get_msg=lambda answer_id: '')
+
+    @staticmethod
+    def find_question_label(answer_id):
+        return f'Question {answer_id}'
+
+    @staticmethod
+    def find_answer_text(_answer_id, current_answer):
+        return f'Answer {current_answer}'
+
+    @staticmethod
+    def find_correct_answer_text(_answer_id):
+        return 'Correct answer'
+
+
+def make_block(children_count):
+    """
+    Create a multi problem block with given number of submitted child problems.
+
+    Returns the block and the backend counting child loads.
+    """
+    children = {}
+    for index in range(children_count):
+        usage_key = f'block-v1:edx+cs1+test+type@problem+block@{index}'
+        child = instantiate_block(SampleProblemBlock, fields={'usage_key': usage_key})
+        child.lcp = FakeLoncapaProblem()
+        child.is_submitted = lambda: True
+        child.is_correct = lambda: True
+        child.score = SimpleNamespace(raw_earned=1, raw_possible=1)
+        children[usage_key] = child
+    block = instantiate_block(MultiProblemBlock, fields={
+        'usage_key': 'block-v1:edx+cs1+test+type@multi_problem+block@1',
+        'children': children,
+    })
+    block.selected_children = lambda: [('problem', usage_key) for usage_key in children]
+    block.allow_resetting_children = True
+    backend = CountingBlockBackend(children)
+    block.runtime.get_block = backend.get_block
+    # Children are exported as pointer nodes to their own files, like in edx-platform
+    block.runtime.add_block_as_child_node = lambda child, node: etree.SubElement(
+        node, 'problem', url_name=str(child.usage_key)
+    )
+    return block, backend
+
+
+def run_benchmarks(children_counts, repeat=5):
+    """
+    Run all scenarios for each number of children and return list of measurements.
+    """
+    results = []
+    with mock.patch(
+        'workbench.runtime.WorkbenchRuntime.local_resource_url',
+        lambda _, _block, path: '/expanded/url/to/multi_problem_xblock/' + path,
+    ):
+        for children in children_counts:
+            results.extend(_run_scenarios(children, repeat))
+    return results
+
+
+def _run_scenarios(children, repeat):
+    """
+    Measure all scenarios for the given number of children.
+    """
+    block, backend = make_block(children)
+
+    def reset_showanswer():
+        block.showanswer = L_SHOWANSWER.NEVER if block.showanswer != L_SHOWANSWER.NEVER else L_SHOWANSWER.ALWAYS
+
+    xml_object = make_export(children)
+    import_system = FakeImportSystem()
+    scenarios = [
+        ('student_view', lambda: block.student_view({}), None),
+        ('get_overall_progress', lambda: block.handle('get_overall_progress', Request.blank('/')), None),
+        ('get_state', lambda: block.handle('get_state', Request.blank('/')), None),
+        ('get_test_scores', lambda: block.handle('get_test_scores', Request.blank('/')), TEST_RESULTS_CACHE.clear),
+        (
+            'handle_slide_change',
+            lambda: block.handle('handle_slide_change', make_request({'current_slide': 1})),
+            None,
+        ),
+        ('editor_saved', lambda: block.editor_saved(None, {}, None), reset_showanswer),
+        ('xml_import', lambda: MultiProblemBlock.definition_from_xml(xml_object, import_system), None),
+        ('xml_export', lambda: etree.tostring(block.definition_to_xml(None), encoding='utf-8'), None),
+    ]
+    results = [
+        measure(name, children, run, setup=setup, backend=backend, repeat=repeat)
+        for name, run, setup in scenarios
+    ]
+    # Same view with children rendered by a thread pool, compared against the sequential student_view
+    concurrent_block, concurrent_backend = make_block(children)
+    settings_service = mock.Mock()
+    settings_service.get_settings_bucket.return_value = {'RENDER_WORKERS': 4}
+    concurrent_block.runtime._services['settings'] = settings_service  # pylint: disable=protected-access
+    results.append(measure(
+        'student_view_concurrent',
+        children,
+        lambda: concurrent_block.student_view({}),
+        backend=concurrent_backend,
+        repeat=repeat,
+    ))
+    return results
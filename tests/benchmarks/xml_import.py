@@ -0,0 +1,76 @@
+"""
+Benchmark of Multi Problem Block OLX import over synthetic exports.
+
+Usage: python -m tests.benchmarks.xml_import [--children 10 100 1000] [--workers 1 4]
+"""
+import argparse
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from lxml import etree
+
+from multi_problem_xblock.multi_problem_xblock import MultiProblemBlock
+
+PROBLEM_XML = '''
+<problem url_name="problem_{index}" display_name="Problem {index}">
+  <multiplechoiceresponse>
+    <label>Question {index}</label>
+    <choicegroup type="MultipleChoice">
+      <choice correct="false">Answer A</choice>
+      <choice correct="true">Answer B</choice>
+      <choice correct="false">Answer C</choice>
+    </choicegroup>
+  </multiplechoiceresponse>
+</problem>
+'''
+
+
+class FakeImportSystem:
+    """ Import system parsing children the way edx-platform ImportSystem.process_xml does """
+    error_tracker = None
+
+    @staticmethod
+    def process_xml(xml):
+        node = etree.fromstring(xml)
+        return SimpleNamespace(scope_ids=SimpleNamespace(usage_id=node.get('url_name')))
+
+
+def make_export(children):
+    """
+    Build synthetic `multi_problem` OLX with given number of problems.
+    """
+    problems = ''.join(PROBLEM_XML.format(index=index) for index in range(children))
+    return etree.fromstring(f'<multi_problem display_name="Test">{problems}</multi_problem>')
+
+
+def benchmark(children, workers, repeat=3):
+    """
+    Return best time of importing a synthetic export, in seconds.
+    """
+    xml_object = make_export(children)
+    system = FakeImportSystem()
+    timings = []
+    with mock.patch(
+        'multi_problem_xblock.multi_problem_xblock.get_xblock_settings', return_value={'IMPORT_WORKERS': workers}
+    ):
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            _definition, loaded_children = MultiProblemBlock.definition_from_xml(xml_object, system)
+            timings.append(time.perf_counter() - start_time)
+    assert len(loaded_children) == children
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--children', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+    for children in args.children:
+        for workers in args.workers:
+            print(f'children={children:<6} workers={workers:<3} {benchmark(children, workers) * 1000:10.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
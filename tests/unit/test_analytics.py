@@ -0,0 +1,209 @@
+import csv
+import io
+import tracemalloc
+import unittest
+from collections import namedtuple
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import urlencode
+
+import ddt
+from webob import Request
+from xblock.fields import Scope
+
+from multi_problem_xblock import analytics
+from multi_problem_xblock.analytics import ScoreAnalytics, export_block_analytics
+
+from ..utils import TestCaseMixin, make_multi_problem_block
+
+XBlockUserState = namedtuple('XBlockUserState', ['username', 'block_key', 'state', 'updated', 'scope'])
+
+
+def stats(earned, possible=1, submitted=True):
+    return {'submitted': submitted, 'attempts': int(submitted), 'earned': earned, 'possible': possible}
+
+
+def correctness(p2_correct, p3_correct):
+    return {'correctness': {
+        'p1': {'p1_2_1': True},
+        'p2': {'p2_2_1': p2_correct, 'p2_3_1': p2_correct},
+        'p3': {'p3_2_1': p3_correct},
+    }}
+
+
+LEARNER_STATES = {
+    'alice': {
+        'problem_stats': {'p1': stats(1), 'p2': stats(1), 'p3': stats(1)},
+        'test_results': correctness(True, True),
+    },
+    'bob': {
+        'problem_stats': {'p1': stats(1), 'p2': stats(0), 'p3': stats(0)},
+        'test_results': correctness(False, False),
+    },
+    'carol': {'problem_stats': {'p1': stats(1), 'p2': stats(1), 'p3': stats(0, submitted=False)}},
+    'dave': {'current_slide': 1},
+    'erin': {'problem_stats': {'html': None, 'p1': stats(2, possible=2)}},
+    # Did not load the block since problem_stats was introduced, scored from child problem states.
+    'frank': {'selected': [['problem', 'p1'], ['problem', 'p2'], ['html', 'h1']]},
+}
+
+CHILD_STATES = {
+    ('frank', 'p1'): {'done': True, 'attempts': 1, 'score': {'raw_earned': 1, 'raw_possible': 1}},
+}
+
+# Usage keys of children are their block ids.
+BLOCK_KEY = SimpleNamespace(course_key=SimpleNamespace(make_usage_key=lambda _block_type, block_id: block_id))
+
+
+class FakeUserStateStore:
+    """ Test double of edx-platform user state client, generating learner states on demand """
+
+    def __init__(self, states, child_states=None):
+        self.states = states
+        self.child_states = child_states or {}
+
+    def iter_all_for_block(self, block_key, scope=Scope.user_state):
+        for username, state in self.states():
+            yield XBlockUserState(username, block_key, state, None, scope)
+
+    def get_many(self, username, block_keys, scope=Scope.user_state):
+        for block_key in block_keys:
+            if (username, block_key) in self.child_states:
+                yield XBlockUserState(username, block_key, self.child_states[username, block_key], None, scope)
+
+
+class NullWriter:
+    """ Text file discarding written data, so that output size does not count in memory usage """
+
+    @staticmethod
+    def write(data):
+        return len(data)
+
+
+def make_learner_states(count):
+    for index in range(count):
+        yield f'learner{index}', {'problem_stats': {f'p{problem}': stats(index % 2) for problem in range(5)}}
+
+
+@ddt.ddt
+class ScoreAnalyticsTests(unittest.TestCase):
+    """ Unit tests for the score analytics of all learners """
+
+    def process(self, use_numpy, chunk_size=2):
+        if use_numpy and analytics.get_numpy() is None:
+            self.skipTest('NumPy is not installed')
+        store = FakeUserStateStore(LEARNER_STATES.items, CHILD_STATES)
+        score_analytics = ScoreAnalytics(
+            0.5, chunk_size=chunk_size, use_numpy=use_numpy, user_state_client=store, course_key=BLOCK_KEY.course_key
+        )
+        rows = list(score_analytics.process(store.iter_all_for_block('block')))
+        return score_analytics, rows
+
+    @ddt.data(True, False)
+    def test_learner_rows(self, use_numpy):
+        rows = self.process(use_numpy)[1]
+        self.assertEqual(rows, [
+            ('alice', True, 3.0, 3.0, 1.0, True, False),
+            ('bob', True, 1.0, 3.0, 0.3333, False, False),
+            ('carol', False, 2.0, 3.0, 0.6667, False, False),
+            ('dave', None, None, None, None, None, True),
+            ('erin', True, 2.0, 2.0, 1.0, True, False),
+            ('frank', False, 1.0, 1.0, 1.0, False, False),
+        ])
+
+    @ddt.data(True, False)
+    def test_summary(self, use_numpy):
+        summary = self.process(use_numpy)[0].summary()
+        problems = {problem.pop('usage_id'): problem for problem in summary.pop('problems')}
+        self.assertEqual(summary, {
+            'learners': 5,
+            'missing_state': 1,
+            'completed': 3,
+            'passed': 2,
+            'pass_rate': 0.4,
+            'average_score': 0.75,
+        })
+        self.assertEqual(problems['p1'], {
+            'learners': 5, 'submitted': 5, 'correct': 5, 'correct_rate': 1, 'average_score': 1,
+            'answers': [{'answer_id': 'p1_2_1', 'learners': 2, 'correct': 2, 'correct_rate': 1}],
+        })
+        self.assertEqual(problems['p2'], {
+            'learners': 4, 'submitted': 3, 'correct': 2, 'correct_rate': 2 / 3, 'average_score': 2 / 3,
+            'answers': [
+                {'answer_id': 'p2_2_1', 'learners': 2, 'correct': 1, 'correct_rate': 0.5},
+                {'answer_id': 'p2_3_1', 'learners': 2, 'correct': 1, 'correct_rate': 0.5},
+            ],
+        })
+        self.assertEqual(problems['p3'], {
+            'learners': 3, 'submitted': 2, 'correct': 1, 'correct_rate': 0.5, 'average_score': 1 / 3,
+            'answers': [{'answer_id': 'p3_2_1', 'learners': 2, 'correct': 1, 'correct_rate': 0.5}],
+        })
+
+    def test_export_block_analytics(self):
+        output = io.StringIO()
+        summary = export_block_analytics(
+            BLOCK_KEY, 0.5, output, FakeUserStateStore(LEARNER_STATES.items, CHILD_STATES)
+        )
+        self.assertEqual((summary['learners'], summary['missing_state']), (5, 1))
+        rows = list(csv.reader(io.StringIO(output.getvalue())))
+        self.assertEqual(rows[0], list(analytics.LEARNER_CSV_HEADER))
+        self.assertEqual(rows[1], ['alice', 'True', '3.0', '3.0', '1.0', 'True', 'False'])
+        self.assertEqual(rows[4], ['dave', '', '', '', '', '', 'True'])
+        self.assertEqual(rows[6], ['frank', 'False', '1.0', '1.0', '1.0', 'False', 'False'])
+        self.assertEqual(len(rows), 7)
+
+    def test_missing_state_without_user_state_client(self):
+        """Verify learners without problem_stats are counted as missing state if child states cannot be read"""
+        score_analytics = ScoreAnalytics(0.5, chunk_size=2)
+        rows = list(score_analytics.process(FakeUserStateStore(LEARNER_STATES.items).iter_all_for_block('block')))
+        self.assertEqual([row[0] for row in rows if row[-1]], ['dave', 'frank'])
+        self.assertEqual(score_analytics.summary()['missing_state'], 2)
+
+    def _peak_memory(self, learners):
+        store = FakeUserStateStore(lambda: make_learner_states(learners))
+        tracemalloc.start()
+        try:
+            export_block_analytics(BLOCK_KEY, 0.5, NullWriter(), store, chunk_size=500)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_export_block_analytics_memory(self):
+        """Verify memory used to aggregate learners does not grow with their number"""
+        small, large = self._peak_memory(2000), self._peak_memory(20000)
+        self.assertLess(large, small * 1.5)
+
+
+class AnalyticsHandlerTests(TestCaseMixin, unittest.TestCase):
+    """ Tests for the analytics handler of the Multi-problem block """
+
+    def setUp(self):
+        self.block = make_multi_problem_block(3)
+        self.block.runtime._services['user_state_client'] = FakeUserStateStore(  # pylint: disable=protected-access
+            LEARNER_STATES.items, CHILD_STATES
+        )
+        self.set_user_attributes({'edx-platform.user_role': 'staff'})
+
+    def set_user_attributes(self, opt_attrs):
+        user_service = mock.Mock()
+        user_service.get_current_user.return_value = mock.Mock(opt_attrs=opt_attrs)
+        self.block.runtime._services['user'] = user_service  # pylint: disable=protected-access
+
+    def test_analytics_forbidden(self):
+        self.set_user_attributes({'edx-platform.user_role': 'student'})
+        response = self.call_handler('get_analytics', expect_json=False, method='GET')
+        self.assertEqual(response.status_code, 403)
+
+    def test_analytics_summary(self):
+        self.set_user_attributes({'edx-platform.user_is_staff': True})
+        self.block.cut_off_score = 0.5
+        summary = self.call_handler('get_analytics', method='GET')
+        self.assertEqual(summary['learners'], 5)
+        self.assertEqual(summary['missing_state'], 1)
+        self.assertEqual(summary['passed'], 2)
+
+    def test_analytics_csv(self):
+        response = self.block.handle('get_analytics', Request.blank('/?' + urlencode({'format': 'csv'})))
+        self.assertEqual(response.content_type, 'text/csv')
+        rows = list(csv.reader(io.StringIO(response.body.decode('utf-8'))))
+        self.assertEqual([row[0] for row in rows], ['username', 'alice', 'bob', 'carol', 'dave', 'erin', 'frank'])
@@ -1,12 +1,37 @@
+import json
 import unittest
 from unittest import mock
+from urllib.parse import urlencode
 
 import ddt
+from lxml import etree
+from web_fragments.fragment import Fragment
+from webob import Request
+from xblock.fields import Boolean, Scope
 
+from multi_problem_xblock import metrics, multi_problem_xblock
 from multi_problem_xblock.compat import L_SHOWANSWER, L_ShowCorrectness
-from multi_problem_xblock.multi_problem_xblock import DISPLAYFEEDBACK, SCORE_DISPLAY_FORMAT, MultiProblemBlock
+from multi_problem_xblock.multi_problem_xblock import (
+    COMPLETION_PUBLISH_STATS,
+    DISPLAYFEEDBACK,
+    QUESTION_TEXT_CACHE,
+    SCORE_DISPLAY_FORMAT,
+    TEST_RESULTS_CACHE,
+    MultiProblemBlock,
+)
 
-from ..utils import SampleProblemBlock, TestCaseMixin, instantiate_block
+from ..utils import CountingBlockBackend, SampleProblemBlock, TestCaseMixin, instantiate_block
+
+
+class CapaProblemBlock(SampleProblemBlock):
+    """ Sample problem persisting submission status and score in fields, like capa problems """
+    done = Boolean(scope=Scope.user_state, default=False)
+
+    def is_submitted(self):
+        return self.lcp.done
+
+    def calculate_score(self):
+        return self.lcp.calculate_score()
 
 
 @ddt.ddt
@@ -30,6 +55,9 @@ class BasicTests(TestCaseMixin, unittest.TestCase):
         self.block.selected_children = lambda: [('problem', child) for child in self.children]
         self.block.allow_resetting_children = True
         self.patch_workbench()
+        self.addCleanup(TEST_RESULTS_CACHE.clear)
+        QUESTION_TEXT_CACHE.clear()
+        self.addCleanup(QUESTION_TEXT_CACHE.clear)
 
     @staticmethod
     def _make_submission(modify_submission=None):
@@ -57,6 +85,21 @@ class BasicTests(TestCaseMixin, unittest.TestCase):
             expected_calls = [mock.call(self.block, 'completion', {'completion': completion})]
             self.assertEqual(patched_publish.mock_calls, expected_calls)
 
+    def test_publish_completion_deduplicated(self):
+        """Verify completion is only published when its value changes"""
+        completion_service = mock.Mock()
+        completion_service.completion_tracking_enabled.return_value = True
+        self.block.runtime._services['completion'] = completion_service  # pylint: disable=protected-access
+        stats = COMPLETION_PUBLISH_STATS.copy()
+        self.assertPublishEvent(0.5)
+        with mock.patch('workbench.runtime.WorkbenchRuntime.publish', mock.Mock()) as patched_publish:
+            self.block.publish_completion(0.5)
+            patched_publish.assert_not_called()
+        self.assertPublishEvent(1)
+        self.assertEqual(self.block.published_completion, 1)
+        self.assertEqual(COMPLETION_PUBLISH_STATS['emitted'] - stats['emitted'], 2)
+        self.assertEqual(COMPLETION_PUBLISH_STATS['suppressed'] - stats['suppressed'], 1)
+
     def test_template_contents(self):
         """Verify rendered template contents"""
         context = {}
@@ -86,7 +129,144 @@ class BasicTests(TestCaseMixin, unittest.TestCase):
             'next_page_on_submit': False,
         })
         for index, item in enumerate(items):
-            self.assertEqual(item['id'], self.children_ids[index])
+            self.assertEqual(item.id, self.children_ids[index])
+
+    def test_student_view_context_bookmarks(self):
+        """Verify bookmarks of all children are fetched with a single call"""
+        bookmarks_service = mock.Mock()
+        bookmarks_service.bookmarks.return_value = [
+            {'usage_id': self.children_ids[1]},
+            {'usage_id': 'block-v1:edx+cs1+test+type@html+block@other'},
+        ]
+        self.block.runtime._services['bookmarks'] = bookmarks_service  # pylint: disable=protected-access
+        _, template_context, _ = self.block.student_view_context({})
+        self.assertEqual([item.is_bookmarked for item in template_context['items']], [False, True, False])
+        self.assertTrue(template_context['bookmarks_service_enabled'])
+        bookmarks_service.bookmarks.assert_called_once_with(course_key=self.block.usage_key.course_key)
+        bookmarks_service.is_bookmarked.assert_not_called()
+
+    def test_student_view_context_bookmarks_fallback(self):
+        """Verify each child is checked separately if bookmarks service cannot list bookmarks"""
+        bookmarks_service = mock.Mock(spec=['is_bookmarked'])
+        bookmarks_service.is_bookmarked.side_effect = lambda usage_key: str(usage_key) == self.children_ids[0]
+        self.block.runtime._services['bookmarks'] = bookmarks_service  # pylint: disable=protected-access
+        _, template_context, _ = self.block.student_view_context({})
+        self.assertEqual([item.is_bookmarked for item in template_context['items']], [True, False, False])
+        self.assertEqual(bookmarks_service.is_bookmarked.call_count, len(self.children_ids))
+
+    def _set_xblock_settings(self, **xblock_settings):
+        """
+        Provide settings service returning given values from XBLOCK_SETTINGS bucket.
+        """
+        settings_service = mock.Mock()
+        settings_service.get_settings_bucket.side_effect = lambda block, default=None: xblock_settings
+        self.block.runtime._services['settings'] = settings_service  # pylint: disable=protected-access
+
+    def test_lazy_student_view_context(self):
+        """Verify only current slide and its neighbours are rendered in lazy mode"""
+        self._set_xblock_settings(LAZY_SLIDE_RENDERING=True, LAZY_SLIDE_PRELOAD_NEIGHBOURS=0)
+        self.block.current_slide = 1
+        with mock.patch.object(SampleProblemBlock, 'render', return_value=Fragment('problem')) as patched_render:
+            _, template_context, _ = self.block.student_view_context({})
+        self.assertEqual(patched_render.call_count, 1)
+        items = template_context['items']
+        self.assertEqual([item.is_lazy for item in items], [True, False, True])
+        self.assertEqual([item.content for item in items], ['', 'problem', ''])
+        self.assertEqual([item.index for item in items], [0, 1, 2])
+
+    @ddt.data(1, 3)
+    def test_student_view_context_deduplicates_resources(self, children_count):
+        """Verify resources shared by children are added to the fragment once, in their first occurrence order"""
+        child_fragment = Fragment('problem')
+        child_fragment.add_css_url('/static/capa.css')
+        child_fragment.add_javascript('var capa;')
+        child_fragment.add_javascript_url('/static/capa.js')
+        self.block.selected_children = lambda: [('problem', child) for child in self.children_ids[:children_count]]
+        with mock.patch.object(SampleProblemBlock, 'render', return_value=child_fragment):
+            fragment, _, _ = self.block.student_view_context({})
+        self.assertEqual(fragment.resources, child_fragment.resources)
+
+    @ddt.data(1, 3)
+    def test_student_view_context_render_workers(self, workers):
+        """Verify children rendered by a thread pool keep slide order"""
+        self._set_xblock_settings(RENDER_WORKERS=workers)
+        with mock.patch.object(
+            SampleProblemBlock, 'render', autospec=True, side_effect=lambda child, _view, _context: Fragment(
+                str(child.usage_key)
+            )
+        ), mock.patch('multi_problem_xblock.multi_problem_xblock.connections') as connections:
+            _, template_context, _ = self.block.student_view_context({})
+        self.assertEqual([item.content for item in template_context['items']], self.children_ids)
+        # Database connections of pool threads are closed, the request thread keeps its own
+        self.assertEqual(connections.close_all.call_count, len(self.children_ids) if workers > 1 else 0)
+
+    def test_student_view_context_render_workers_request_context(self):
+        """Verify children rendered by a thread pool see the request, user and metrics recorder of the request"""
+        crum = multi_problem_xblock.crum
+        if crum is None:
+            self.skipTest('crum is not installed')
+        self._set_xblock_settings(RENDER_WORKERS=3)
+        request, user = mock.Mock(), mock.Mock()
+        seen = []
+
+        def render(_child, _view, _context):
+            seen.append((crum.get_current_request(), crum.get_current_user(), metrics.current_metrics()))
+            return Fragment()
+
+        crum.set_current_request(request)
+        crum.set_current_user(user)
+        self.addCleanup(crum.set_current_request, None)
+        with mock.patch.object(SampleProblemBlock, 'render', autospec=True, side_effect=render), mock.patch(
+            'multi_problem_xblock.multi_problem_xblock.connections'
+        ) as connections:
+            recorder = metrics.MetricsRecorder('student_view')
+            token = metrics._current_recorder.set(recorder)  # pylint: disable=protected-access
+            try:
+                self.block.student_view_context({})
+            finally:
+                metrics._current_recorder.reset(token)  # pylint: disable=protected-access
+        self.assertEqual(seen, [(request, user, recorder)] * len(self.children_ids))
+        self.assertEqual(connections.close_all.call_count, len(self.children_ids))
+
+    def test_student_view_context_render_workers_failure(self):
+        """Verify errors raised while rendering a child in a thread pool are propagated"""
+        self._set_xblock_settings(RENDER_WORKERS=3)
+        with mock.patch.object(SampleProblemBlock, 'render', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                self.block.student_view_context({})
+
+    def test_lazy_template_contents(self):
+        """Verify placeholders are rendered for slides which are loaded on demand"""
+        self._set_xblock_settings(LAZY_SLIDE_RENDERING=True)
+        student_fragment = self.block.runtime.render(self.block, 'student_view', {})
+        self.assertIn('data-index="2"', student_fragment.content)
+        self.assertIn('<div class="slide-placeholder" data-loaded="false"></div>', student_fragment.content)
+
+    def test_render_slide_handler(self):
+        """Verify render_slide handler returns fragment of given slide"""
+        with mock.patch.object(SampleProblemBlock, 'render', return_value=Fragment('problem')):
+            res = self.call_handler('render_slide', {'index': 2})
+        self.assertEqual(res['index'], 2)
+        self.assertEqual(res['id'], self.children_ids[2])
+        self.assertEqual(res['content'], 'problem')
+        self.assertEqual(res['resources'], [])
+
+    @ddt.data({}, {'index': 'invalid'}, {'index': 3}, {'index': -1})
+    def test_render_slide_handler_invalid_index(self, data):
+        """Verify render_slide handler returns error for invalid slide index"""
+        res = self.call_handler('render_slide', data, expect_json=False)
+        self.assertIn(res.status_code, (400, 404))
+
+    def test_children_iterator_bulk_operation(self):
+        """Verify children are loaded one by one within a modulestore bulk operation"""
+        backend = CountingBlockBackend(self.children)
+        self.block.runtime.get_block = backend.get_block
+        self.block.runtime.modulestore = mock.MagicMock()
+        children_iterator = self.block._children_iterator()  # pylint: disable=protected-access
+        children = [child for _index, _block_type, child in children_iterator]
+        self.assertEqual(children, list(self.children.values()))
+        self.assertEqual(backend.round_trips, len(self.children))
+        self.block.runtime.modulestore.bulk_operations.assert_called_once_with(self.block.usage_key.course_key)
 
     def test_editor_saved(self):
         """Verify whether child values are updated based on parent block"""
@@ -104,6 +284,67 @@ class BasicTests(TestCaseMixin, unittest.TestCase):
         for child in self.block.get_children():
             self.assertEqual(child.show_correctness, L_ShowCorrectness.ALWAYS)
 
+    def test_slide_change_handler(self):
+        """Check slide change handler only writes current_slide when it changes"""
+        self.call_handler(self.SLIDE_CHANGE_HANDLER, {'current_slide': 2}, expect_json=False)
+        self.assertEqual(self.block.current_slide, 2)
+        self.block.save()
+
+        self.call_handler(self.SLIDE_CHANGE_HANDLER, {'current_slide': 2}, expect_json=False)
+        fields_to_save = self.block._get_fields_to_save()  # pylint: disable=protected-access
+        self.assertNotIn('current_slide', fields_to_save)
+
+    def test_editor_saved_skips_unchanged_children(self):
+        """Verify only children with outdated values are saved, within a modulestore bulk operation"""
+        self.block.runtime.modulestore = mock.MagicMock()
+        for child in self.block.get_children():
+            child.save = mock.Mock()
+        self.block.showanswer = L_SHOWANSWER.NEVER
+        self.block.editor_saved(None, {'showanswer': L_SHOWANSWER.FINISHED}, None)
+        for child in self.block.get_children():
+            child.save.assert_called_once()
+            child.save.reset_mock()
+        self.block.runtime.modulestore.bulk_operations.assert_called_once_with(self.block.usage_key.course_key)
+
+        # Nothing changed, children are not saved again
+        self.block.editor_saved(None, {'showanswer': L_SHOWANSWER.NEVER}, None)
+        for child in self.block.get_children():
+            child.save.assert_not_called()
+        self.block.runtime.modulestore.bulk_operations.assert_called_once()
+
+        # Only the child with outdated value is saved
+        first_child = self.block.children[self.children_ids[0]]
+        first_child.showanswer = L_SHOWANSWER.ALWAYS
+        self.block.editor_saved(None, {'showanswer': L_SHOWANSWER.NEVER}, None)
+        self.assertEqual(first_child.showanswer, L_SHOWANSWER.NEVER)
+        first_child.save.assert_called_once()
+        self.block.children[self.children_ids[1]].save.assert_not_called()
+
+    @ddt.data(1, 3)
+    def test_definition_from_xml(self, workers):
+        """Verify children are loaded in order, skipping comments and reporting failures"""
+        xml_object = etree.fromstring(
+            '<multi_problem display_name="Test">'
+            '<problem url_name="p0"/><!-- comment --><problem url_name="p1"/><problem url_name="p2"/>'
+            '</multi_problem>'
+        )
+
+        def process_xml(xml):
+            node = etree.fromstring(xml)
+            if node.get('url_name') == 'p1':
+                raise etree.XMLSyntaxError('invalid', None, 0, 0)
+            return mock.Mock(scope_ids=mock.Mock(usage_id=node.get('url_name')))
+
+        system = mock.Mock(process_xml=mock.Mock(side_effect=process_xml))
+        with mock.patch(
+            'multi_problem_xblock.multi_problem_xblock.get_xblock_settings', return_value={'IMPORT_WORKERS': workers}
+        ):
+            definition, children = MultiProblemBlock.definition_from_xml(xml_object, system)
+        self.assertEqual(definition, {'display_name': 'Test'})
+        self.assertEqual(children, ['p0', 'p2'])
+        self.assertEqual(system.process_xml.call_count, 3)
+        system.error_tracker.assert_called_once()
+
     def test_incomplete_overall_progress_handler(self):
         """Check progress handler information when all problems are not completed"""
         # Check progress handler when 2/3 problems are completed
@@ -113,6 +354,73 @@ class BasicTests(TestCaseMixin, unittest.TestCase):
         res = self.call_handler('get_overall_progress', {}, method='GET')
         self.assertEqual(res, {'overall_progress': int((2 / 3) * 100)})
 
+    def test_overall_progress_handler_updates_single_child(self):
+        """Check progress handler refreshes only the updated child when problem_stats is up to date"""
+        for child in self.block.get_children():
+            child.is_submitted = lambda: False
+        # First call builds problem_stats from all children
+        res = self.call_handler('get_overall_progress', {}, method='GET')
+        self.assertEqual(res, {'overall_progress': 0})
+
+        self.block.children[self.children_ids[1]].is_submitted = lambda: True
+        get_block = self.block.runtime.get_block = mock.Mock(side_effect=self.block.children.get)
+        request = Request.blank('/?' + urlencode({'usage_id': self.children_ids[1]}))
+        res = json.loads(self.block.handle('get_overall_progress', request).body.decode('utf-8'))
+        self.assertEqual(res, {'overall_progress': int((1 / 3) * 100)})
+        get_block.assert_called_once_with(self.children_ids[1])
+        self.assertTrue(self.block.problem_stats[self.children_ids[1]]['submitted'])
+
+    def test_problem_stats_rebuilt_when_stale(self):
+        """Check problem_stats is rebuilt when it does not match selected children"""
+        self.block.problem_stats = {'block-v1:edx+cs1+test+type@problem+block@old': None}
+        for child in self.block.get_children():
+            child.is_submitted = lambda: True
+        request = Request.blank('/?' + urlencode({'usage_id': self.children_ids[1]}))
+        res = json.loads(self.block.handle('get_overall_progress', request).body.decode('utf-8'))
+        self.assertEqual(res, {'overall_progress': 100})
+        self.assertEqual(set(self.block.problem_stats), set(self.children_ids))
+
+    def test_get_state_handler(self):
+        """Check state handler returns user state and 304 when it did not change"""
+        self.block.publish_completion = mock.Mock()
+        self.block.cut_off_score = 0.5
+        self._complete_problems()
+        response = self.block.handle(self.GET_STATE_HANDLER, Request.blank('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.body.decode('utf-8')), {
+            'overall_progress': 100,
+            'completion': 1,
+            'results_available': True,
+            'current_slide': 0,
+            'passed': True,
+        })
+        self.block.publish_completion.assert_called_once_with(1)
+
+        request = Request.blank('/', headers={'If-None-Match': response.headers['ETag']})
+        response = self.block.handle(self.GET_STATE_HANDLER, request)
+        self.assertEqual(response.status_code, 304)
+        self.block.publish_completion.assert_called_once_with(1)
+
+        # Slide change updates the ETag
+        self.block.current_slide = 1
+        response = self.block.handle(self.GET_STATE_HANDLER, request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.body.decode('utf-8'))['current_slide'], 1)
+
+    def test_get_state_handler_incomplete(self):
+        """Check state handler when all problems are not completed"""
+        self.block.children[self.children_ids[0]].is_submitted = lambda: True
+        self.block.children[self.children_ids[1]].is_submitted = lambda: False
+        self.block.children[self.children_ids[2]].is_submitted = lambda: False
+        res = self.call_handler(self.GET_STATE_HANDLER, {}, method='GET')
+        self.assertEqual(res, {
+            'overall_progress': int((1 / 3) * 100),
+            'completion': int((1 / 3) * 100) / 100,
+            'results_available': False,
+            'current_slide': 0,
+            'passed': False,
+        })
+
     def test_completed_overall_progress_handler(self):
         """Check progress handler information when all problems are completed"""
         self.block.publish_completion = mock.Mock()
@@ -159,6 +467,136 @@ class BasicTests(TestCaseMixin, unittest.TestCase):
         self.assertIn('answer0', res.text)
         self.assertIn('<b class="test-score">2/3</b>', res.text)
 
+    def test_get_scores_loads_children_once(self):
+        """Test get_test_scores handler loads each child problem only once if results were not precomputed"""
+        for child in self.block.get_children():
+            child.is_submitted = lambda: True
+            child.is_correct = lambda: True
+            child.score = mock.Mock(raw_earned=1, raw_possible=1)
+        self.call_handler('get_overall_progress', {}, method='GET')
+        self.block.test_results = {}
+        get_block = self.block.runtime.get_block = mock.Mock(side_effect=self.block.children.get)
+        res = self.call_handler('get_test_scores', {}, expect_json=False, method='GET')
+        self.assertIn('<b class="test-score">3/3</b>', res.text)
+        self.assertEqual(get_block.call_count, len(self.children_ids))
+
+    def test_score_reads_persisted_child_fields(self):
+        """Test problem score is read from persisted fields, LoncapaProblem is only built for legacy state"""
+        children = {
+            usage_key: instantiate_block(CapaProblemBlock, fields={'usage_key': usage_key, 'done': True})
+            for usage_key in self.children_ids
+        }
+        self.block.children = children
+        self.block.runtime.get_block = children.get
+        for child in list(children.values())[:2]:
+            child.score = mock.Mock(raw_earned=1, raw_possible=1)
+        # Test results with question answers are not precomputed
+        self.block.display_feedback = DISPLAYFEEDBACK.NEVER
+        # Fields of the class are collected by inspecting all its attributes, do it before lcp is patched.
+        self.assertIn('done', CapaProblemBlock.fields)
+        with mock.patch.object(CapaProblemBlock, 'lcp', new_callable=mock.PropertyMock) as lcp:
+            lcp.return_value.calculate_score.return_value = mock.Mock(raw_earned=0, raw_possible=2)
+            self.call_handler('get_overall_progress', {}, method='GET')
+            # Only the problem without persisted score builds its LoncapaProblem
+            self.assertEqual(lcp.call_count, 1)
+        self.assertEqual(
+            [(stats['submitted'], stats['earned'], stats['possible']) for stats in self.block.problem_stats.values()],
+            [(True, 1, 1), (True, 1, 1), (True, 0, 2)],
+        )
+
+    def test_question_text_cached_for_all_learners(self):
+        """Test question labels and correct answers are only computed again once the content version changes"""
+        child = self.block.children[self.children_ids[0]]
+        lcp = child.lcp
+        lcp.reset_mock()
+        first = self.block._get_question_answers(child, {})  # pylint: disable=protected-access
+        second = self.block._get_question_answers(child, {})  # pylint: disable=protected-access
+        self.assertEqual(
+            (second[0].question, second[0].correct_answer), (first[0].question, first[0].correct_answer)
+        )
+        self.assertEqual(lcp.find_question_label.call_count, 1)
+        self.assertEqual(lcp.find_correct_answer_text.call_count, 1)
+        # User answer is computed for each learner
+        self.assertEqual(lcp.find_answer_text.call_count, 2)
+
+        # Library sync changes the content version
+        self.block.source_library_version = 'library-v2'
+        self.block._get_question_answers(child, {})  # pylint: disable=protected-access
+        self.assertEqual(lcp.find_question_label.call_count, 2)
+        self.assertEqual(lcp.find_correct_answer_text.call_count, 2)
+
+    def test_test_results_precomputed_on_last_submission(self):
+        """Test test results are computed when the last problem is submitted and read by get_test_scores"""
+        self._complete_problems()
+        self.block.children[self.children_ids[2]].is_submitted = lambda: False
+        self.call_handler('get_overall_progress', {}, method='GET')
+        self.assertEqual(self.block.test_results, {})
+
+        self.block.children[self.children_ids[2]].is_submitted = lambda: True
+        request = Request.blank('/?' + urlencode({'usage_id': self.children_ids[2]}))
+        self.block.handle('get_overall_progress', request)
+        self.assertEqual(self.block.test_results['earned'], 3)
+        self.assertEqual(self.block.test_results['possible'], 3)
+        self.assertTrue(self.block.test_results['passed'])
+        # Only correctness of answers is persisted, question and answer text is looked up when rendered
+        self.assertEqual(
+            self.block.test_results['correctness'], {child_id: {'1': True} for child_id in self.children_ids}
+        )
+        self.assertNotIn('question_answers', self.block.test_results)
+
+        get_block = self.block.runtime.get_block = mock.Mock(side_effect=self.block.children.get)
+        with mock.patch.object(MultiProblemBlock, '_prepare_user_score', autospec=True) as prepare_user_score:
+            res = self.call_handler('get_test_scores', {}, expect_json=False, method='GET')
+        prepare_user_score.assert_not_called()
+        self.assertIn('<b class="test-score">3/3</b>', res.text)
+        self.assertIn('question2', res.text)
+        self.assertIn('answer2', res.text)
+        self.assertEqual(get_block.call_count, len(self.children_ids))
+
+    def _complete_problems(self):
+        for child in self.block.get_children():
+            child.is_submitted = lambda: True
+            child.is_correct = lambda: True
+            child.score = mock.Mock(raw_earned=1, raw_possible=1)
+
+    def test_get_scores_cached(self):
+        """Test get_test_scores handler reuses rendered results until the attempt state changes"""
+        self._complete_problems()
+        self.block.publish_completion = mock.Mock()
+        prepare_user_score = MultiProblemBlock._prepare_user_score  # pylint: disable=protected-access
+        with mock.patch.object(
+            MultiProblemBlock, '_prepare_user_score', autospec=True, side_effect=prepare_user_score
+        ) as prepare_user_score:
+            first = self.call_handler('get_test_scores', {}, expect_json=False, method='GET')
+            second = self.call_handler('get_test_scores', {}, expect_json=False, method='GET')
+            self.assertEqual(first.text, second.text)
+            self.assertEqual(prepare_user_score.call_count, 1)
+            self.assertEqual(self.block.publish_completion.call_count, 2)
+
+            # New submission changes the fingerprint and results are rendered again
+            child = self.block.children[self.children_ids[0]]
+            child.lcp.find_question_label.side_effect = None
+            child.lcp.find_answer_text.side_effect = None
+            child.lcp.find_correct_answer_text.side_effect = None
+            child.attempts = 2
+            child.score = mock.Mock(raw_earned=0, raw_possible=1)
+            request = Request.blank('/?' + urlencode({'usage_id': self.children_ids[0]}))
+            self.block.handle('get_overall_progress', request)
+            res = self.call_handler('get_test_scores', {}, expect_json=False, method='GET')
+            self.assertIn('<b class="test-score">2/3</b>', res.text)
+            self.assertEqual(prepare_user_score.call_count, 2)
+
+    def test_reset_clears_cached_scores(self):
+        """Test reset_selected_children drops cached results of the user"""
+        self._complete_problems()
+        self.call_handler('get_test_scores', {}, expect_json=False, method='GET')
+        self.assertEqual(len(TEST_RESULTS_CACHE), 1)
+        with mock.patch('xblock.core.XBlock.reset_selected_children', create=True):
+            self.block.reset_selected_children(None)
+        self.assertEqual(len(TEST_RESULTS_CACHE), 0)
+        self.assertEqual(self.block.problem_stats, {})
+        self.assertEqual(self.block.test_results, {})
+
     def test_get_scores_in_percentage(self):
         """Test get_test_scores handler returns percentage"""
         self.block.score_display_format = SCORE_DISPLAY_FORMAT.PERCENTAGE
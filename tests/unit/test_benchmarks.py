@@ -0,0 +1,43 @@
+import unittest
+from dataclasses import replace
+
+from ..benchmarks.harness import compare
+from ..benchmarks.import_time import DEFERRED_MODULES, PACKAGE, measure_import
+from ..benchmarks.scenarios import run_benchmarks
+
+
+class BenchmarkTests(unittest.TestCase):
+    """ Smoke tests for the benchmark suite, so that it keeps working as the block changes """
+
+    def test_run_benchmarks(self):
+        results = {result.key: result for result in run_benchmarks([2], repeat=1)}
+        self.assertEqual(set(results), {
+            'student_view[2]',
+            'student_view_concurrent[2]',
+            'get_overall_progress[2]',
+            'get_state[2]',
+            'get_test_scores[2]',
+            'handle_slide_change[2]',
+            'editor_saved[2]',
+            'xml_import[2]',
+            'xml_export[2]',
+        })
+        # Test results are precomputed by get_overall_progress, children are only loaded to render question answers
+        self.assertEqual(results['get_test_scores[2]'].child_loads, 2)
+        self.assertEqual(results['handle_slide_change[2]'].child_loads, 0)
+
+    def test_compare(self):
+        result = run_benchmarks([1], repeat=1)[0]
+        baseline = {result.key: result}
+        self.assertEqual(compare([result], baseline), [])
+        slower = replace(result, wall_time=result.wall_time * 2, child_loads=result.child_loads + 1)
+        regressions = compare([slower], baseline, tolerance=0.5)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('wall time', regressions[0])
+        self.assertIn('child loads', regressions[1])
+
+    def test_import_time(self):
+        timings = measure_import()
+        self.assertIn(PACKAGE, timings)
+        for name in DEFERRED_MODULES:
+            self.assertNotIn(name, timings)
@@ -0,0 +1,170 @@
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from xblock.fields import Scope
+
+from multi_problem_xblock.bulk_reset import RESET_BLOCK_STATE, iter_reset_learners, reset_learners
+
+from ..utils import TestCaseMixin, make_multi_problem_block
+
+BLOCK_KEY = 'block-v1:edx+cs1+test+type@multi_problem+block@1'
+CHILD_KEYS = [f'block-v1:edx+cs1+test+type@problem+block@{index}' for index in range(3)]
+
+XBlockUserState = namedtuple('XBlockUserState', ['username', 'block_key', 'state', 'updated', 'scope'])
+
+
+class FakeUserStateClient:
+    """ Test double of edx-platform user state client, keeping states in memory and counting writes """
+
+    def __init__(self, usernames, failing_usernames=(), new_usernames=(), block_key=BLOCK_KEY):
+        self.states = {username: {} for username in new_usernames}
+        for username in usernames:
+            self.states[username] = {block_key: {'current_slide': 2, 'selected': [['problem', '1']]}}
+            self.states[username].update({child_key: {'attempts': 1} for child_key in CHILD_KEYS})
+        self.failing_usernames = failing_usernames
+        self.writes = 0
+
+    def get_many(self, username, block_keys, scope=Scope.user_state):
+        assert scope == Scope.user_state
+        for block_key in block_keys:
+            if block_key in self.states[username]:
+                yield XBlockUserState(username, block_key, self.states[username][block_key], None, scope)
+
+    def set_many(self, username, block_keys_to_state, scope=Scope.user_state):
+        assert scope == Scope.user_state
+        self.writes += 1
+        for block_key, state in block_keys_to_state.items():
+            self.states[username].setdefault(block_key, {}).update(state)
+
+    def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
+        assert scope == Scope.user_state and fields is None
+        if username in self.failing_usernames:
+            raise ValueError('Database error')
+        self.writes += 1
+        for block_key in block_keys:
+            self.states[username].pop(block_key, None)
+
+
+class FakeGrades:
+    """ Test double of edx-platform problem scores, reset with child state like `reset_student_attempts` """
+
+    def __init__(self, client, usernames):
+        self.client = client
+        self.scores = {(username, child_key): 1.0 for username in usernames for child_key in CHILD_KEYS[:2]}
+        self.recalculated = []
+
+    def reset_child_attempts(self, username, child_keys):
+        for child_key in child_keys:
+            self.client.states[username].pop(child_key)
+            self.scores.pop((username, child_key), None)
+            self.recalculated.append((username, child_key))
+
+
+class BulkResetTests(unittest.TestCase):
+    """ Unit tests for the bulk reset of learners """
+
+    def setUp(self):
+        self.usernames = [f'learner{index}' for index in range(5)]
+        self.client = FakeUserStateClient(self.usernames, failing_usernames=['learner3'], new_usernames=['newcomer'])
+        self.usernames.append('newcomer')
+
+    def test_reset_learners(self):
+        progress = reset_learners(self.client, BLOCK_KEY, CHILD_KEYS, self.usernames, batch_size=2)
+        self.assertEqual(progress, {'offset': 2, 'reset': 2, 'skipped': 0, 'failed': [], 'total': 6, 'done': False})
+        self.assertEqual(self.client.states['learner0'], {BLOCK_KEY: RESET_BLOCK_STATE})
+        self.assertEqual(self.client.states['learner2'][BLOCK_KEY]['current_slide'], 2)
+        # Children state is deleted with a single write, and block state with another one
+        self.assertEqual(self.client.writes, 4)
+
+    def test_reset_learners_grades(self):
+        """Verify scores of child problems are reset and grades recalculated when children are reset with them"""
+        grades = FakeGrades(self.client, self.usernames[:5])
+        del self.client.states['learner1'][CHILD_KEYS[2]]
+        progress = reset_learners(
+            self.client, BLOCK_KEY, CHILD_KEYS, self.usernames, batch_size=2,
+            reset_child_attempts=grades.reset_child_attempts,
+        )
+        self.assertEqual(progress['reset'], 2)
+        self.assertEqual(self.client.states['learner1'], {BLOCK_KEY: RESET_BLOCK_STATE})
+        self.assertEqual({username for username, _child_key in grades.scores}, {'learner2', 'learner3', 'learner4'})
+        # Only children with state are reset
+        self.assertEqual(grades.recalculated, [('learner0', key) for key in CHILD_KEYS] + [
+            ('learner1', key) for key in CHILD_KEYS[:2]
+        ])
+        # Child state is deleted with the scores, only block state is written by the reset
+        self.assertEqual(self.client.writes, 2)
+
+    def test_iter_reset_learners(self):
+        progress = list(iter_reset_learners(self.client, BLOCK_KEY, CHILD_KEYS, self.usernames, batch_size=2))
+        self.assertEqual([batch['offset'] for batch in progress], [2, 4, 6])
+        self.assertEqual(progress[1]['failed'], ['learner3'])
+        self.assertTrue(progress[-1]['done'])
+        self.assertEqual(self.client.states['learner4'], {BLOCK_KEY: RESET_BLOCK_STATE})
+        self.assertIn(CHILD_KEYS[0], self.client.states['learner3'])
+        # No state is created for learners who never opened the block
+        self.assertEqual(progress[-1]['skipped'], 1)
+        self.assertEqual(self.client.states['newcomer'], {})
+
+    def test_resume_reset(self):
+        progress = list(iter_reset_learners(self.client, BLOCK_KEY, CHILD_KEYS, self.usernames, offset=4))
+        self.assertEqual(progress, [{'offset': 6, 'reset': 1, 'skipped': 1, 'failed': [], 'total': 6, 'done': True}])
+        self.assertEqual(self.client.states['learner0'][BLOCK_KEY]['current_slide'], 2)
+
+
+class BulkResetHandlerTests(TestCaseMixin, unittest.TestCase):
+    """ Tests for the bulk reset handler of the Multi-problem block """
+
+    def setUp(self):
+        self.block = make_multi_problem_block(3)
+        self.usernames = [f'learner{index}' for index in range(3)]
+        self.client = FakeUserStateClient(self.usernames, block_key=self.block.usage_key)
+        services = self.block.runtime._services  # pylint: disable=protected-access
+        services['user_state_client'] = self.client
+        self.user = mock.Mock(opt_attrs={'edx-platform.user_role': 'instructor'})
+        services['user'] = mock.Mock(get_current_user=mock.Mock(return_value=self.user))
+        services['settings'] = mock.Mock(
+            get_settings_bucket=mock.Mock(return_value={'BULK_RESET_BATCH_SIZE': 2})
+        )
+
+    def test_bulk_reset(self):
+        progress = self.call_handler('bulk_reset_selected_children', {'usernames': self.usernames})
+        self.assertEqual(progress, {'offset': 2, 'reset': 2, 'skipped': 0, 'failed': [], 'total': 3, 'done': False})
+        progress = self.call_handler('bulk_reset_selected_children', {'usernames': self.usernames, 'offset': 2})
+        self.assertTrue(progress['done'])
+        for username in self.usernames:
+            self.assertEqual(self.client.states[username][self.block.usage_key], RESET_BLOCK_STATE)
+            self.assertFalse(set(self.client.states[username]) & set(CHILD_KEYS))
+
+    def test_bulk_reset_grades(self):
+        """Verify children are reset with their scores through edx-platform reset_student_attempts in the LMS"""
+        reset_student_attempts = mock.Mock()
+        self.user.opt_attrs['edx-platform.user_id'] = 7
+        user_model = mock.Mock()
+        user_model.objects.get.side_effect = lambda **kwargs: kwargs
+        with mock.patch(
+            'multi_problem_xblock.multi_problem_xblock.getResetStudentAttempts', return_value=reset_student_attempts
+        ), mock.patch('django.contrib.auth.get_user_model', return_value=user_model):
+            progress = self.call_handler('bulk_reset_selected_children', {'usernames': self.usernames})
+        self.assertEqual(progress['reset'], 2)
+        course_id = self.block.usage_key.course_key
+        self.assertEqual(reset_student_attempts.call_args_list, [
+            mock.call(course_id, {'username': username}, child_key, {'id': 7}, delete_module=True)
+            for username in self.usernames[:2]
+            for child_key in CHILD_KEYS
+        ])
+        # Child state is left to reset_student_attempts, which deletes it along with the score
+        self.assertEqual(self.client.writes, 2)
+
+    def test_bulk_reset_forbidden(self):
+        self.user.opt_attrs = {'edx-platform.user_role': 'student'}
+        response = self.call_handler(
+            'bulk_reset_selected_children', {'usernames': self.usernames}, expect_json=False
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.writes, 0)
+
+    def test_bulk_reset_invalid_data(self):
+        for data in ({}, {'usernames': 'learner0'}, {'usernames': self.usernames, 'offset': 'next'}):
+            response = self.call_handler('bulk_reset_selected_children', data, expect_json=False)
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,102 @@
+import unittest
+from unittest import mock
+
+from django.test import override_settings
+
+from multi_problem_xblock import metrics
+from multi_problem_xblock.multi_problem_xblock import QUESTION_TEXT_CACHE, TEST_RESULTS_CACHE
+
+from ..utils import TestCaseMixin, make_multi_problem_block
+
+
+class MetricsBackendTests(unittest.TestCase):
+    """ Unit tests for the metrics backends """
+
+    def setUp(self):
+        self.addCleanup(metrics.set_metrics_backend, None)
+
+    def test_default_backend(self):
+        metrics.set_metrics_backend(None)
+        self.assertIsInstance(metrics.get_metrics_backend(), metrics.NullMetricsBackend)
+
+    @override_settings(XBLOCK_SETTINGS={
+        'MultiProblemBlock': {'METRICS_BACKEND': 'multi_problem_xblock.metrics.InMemoryMetricsBackend'}
+    })
+    def test_backend_from_settings(self):
+        metrics.set_metrics_backend(None)
+        self.assertIsInstance(metrics.get_metrics_backend(), metrics.InMemoryMetricsBackend)
+
+    @override_settings(XBLOCK_SETTINGS={'MultiProblemBlock': {'METRICS_BACKEND': 'missing.Backend'}})
+    def test_invalid_backend_from_settings(self):
+        metrics.set_metrics_backend(None)
+        self.assertIsInstance(metrics.get_metrics_backend(), metrics.NullMetricsBackend)
+
+    def test_statsd_backend(self):
+        client = mock.Mock(spec=['timing', 'incr'])
+        backend = metrics.StatsdMetricsBackend(client)
+        backend.timing('student_view.latency', 0.5)
+        backend.histogram('student_view.children_loaded', 3)
+        backend.increment('completion.emitted')
+        self.assertEqual(client.mock_calls, [
+            mock.call.timing('multi_problem_xblock.student_view.latency', 500),
+            mock.call.timing('multi_problem_xblock.student_view.children_loaded', 3),
+            mock.call.incr('multi_problem_xblock.completion.emitted', 1),
+        ])
+
+    def test_instrumented(self):
+        backend = metrics.InMemoryMetricsBackend()
+        metrics.set_metrics_backend(backend)
+
+        @metrics.instrumented('view')
+        def view():
+            metrics.current_metrics().count('children_loaded', 2)
+            with metrics.current_metrics().timer('template_render'):
+                pass
+            return mock.Mock(content_length=None, content='content')
+
+        view()
+        self.assertEqual(list(backend.timings), ['view.latency', 'view.template_render'])
+        self.assertEqual(backend.histograms, {
+            'view.children_loaded': [2],
+            'view.child_renders': [0],
+            'view.response_size': [len('content')],
+        })
+        # Metrics recorded outside of instrumented calls are discarded
+        metrics.current_metrics().count('children_loaded')
+        self.assertEqual(backend.histograms['view.children_loaded'], [2])
+
+
+class BlockMetricsTests(TestCaseMixin, unittest.TestCase):
+    """ Tests of metrics recorded by the Multi-problem block views and handlers """
+
+    def setUp(self):
+        self.block = make_multi_problem_block(3)
+        self.patch_workbench()
+        self.addCleanup(TEST_RESULTS_CACHE.clear)
+        QUESTION_TEXT_CACHE.clear()
+        self.addCleanup(QUESTION_TEXT_CACHE.clear)
+        self.backend = metrics.InMemoryMetricsBackend()
+        metrics.set_metrics_backend(self.backend)
+        self.addCleanup(metrics.set_metrics_backend, None)
+
+    def test_student_view_metrics(self):
+        fragment = self.block.student_view({})
+        self.assertEqual(self.backend.histograms['student_view.children_loaded'], [3])
+        self.assertEqual(self.backend.histograms['student_view.child_renders'], [3])
+        self.assertEqual(self.backend.histograms['student_view.response_size'], [len(fragment.content)])
+        self.assertEqual(len(self.backend.timings['student_view.latency']), 1)
+        self.assertEqual(len(self.backend.timings['student_view.template_render']), 1)
+
+    def test_handler_metrics(self):
+        for child in self.block.get_children():
+            child.is_submitted = lambda: True
+            child.is_correct = lambda: True
+            child.score = mock.Mock(raw_earned=1, raw_possible=1)
+        self.call_handler(self.GET_OVERALL_PROGRESS_HANDLER, {}, method='GET')
+        res = self.call_handler(self.GET_TEST_SCORES, {}, expect_json=False, method='GET')
+        # Children are loaded again to precompute test results as all problems are submitted
+        self.assertEqual(self.backend.histograms['get_overall_progress.children_loaded'], [6])
+        # Test results are precomputed, children are only loaded to render question answers
+        self.assertEqual(self.backend.histograms['get_test_scores.children_loaded'], [3])
+        self.assertEqual(self.backend.histograms['get_test_scores.response_size'], [len(res.body)])
+        self.assertEqual(len(self.backend.timings['get_test_scores.template_render']), 1)
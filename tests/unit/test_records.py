@@ -0,0 +1,28 @@
+import unittest
+
+from multi_problem_xblock.records import QuestionAnswer, SlideItem
+
+
+class RecordTests(unittest.TestCase):
+    """ Unit tests for the slotted records """
+
+    def test_record(self):
+        item = SlideItem(
+            id='usage-id', index=0, content='', is_lazy=True, bookmark_id='user,usage-id', is_bookmarked=False
+        )
+        self.assertEqual(item.id, 'usage-id')
+        self.assertEqual(item.index, 0)
+        self.assertTrue(item.is_lazy)
+        item.content = 'problem'
+        self.assertEqual(item.as_dict()['content'], 'problem')
+        self.assertFalse(hasattr(item, '__dict__'))
+        with self.assertRaises(AttributeError):
+            item.extra = True  # pylint: disable=assigning-non-slot
+
+    def test_record_equality(self):
+        answer = QuestionAnswer(question='q', answer='a', correct_answer='c', is_correct=True, msg='')
+        self.assertEqual(answer, QuestionAnswer('q', 'a', 'c', True, ''))
+        self.assertNotEqual(answer, QuestionAnswer('q', 'b', 'c', False, ''))
+        self.assertEqual(
+            repr(answer), "QuestionAnswer(question='q', answer='a', correct_answer='c', is_correct=True, msg='')"
+        )
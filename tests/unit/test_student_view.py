@@ -0,0 +1,71 @@
+import tracemalloc
+import unittest
+
+from web_fragments.fragment import Fragment
+
+from ..utils import TestCaseMixin, make_multi_problem_block
+
+
+class StudentViewMemoryTests(TestCaseMixin, unittest.TestCase):
+    """ Tests for memory usage of the student view of large Multi-problem blocks """
+
+    SLIDES = 200
+    SLIDE_SIZE = 10000
+
+    def setUp(self):
+        self.block = make_multi_problem_block(self.SLIDES)
+        self.patch_workbench()
+        # Each child renders its own content, like real problems
+        self.apply_patch(
+            'tests.utils.SampleProblemBlock.render',
+            autospec=True,
+            side_effect=lambda child, _view, _context: Fragment(f'<p>{child.usage_key}</p>' + 'x' * self.SLIDE_SIZE),
+        )
+
+    def test_student_view_peak_memory(self):
+        """Verify slides are assembled without holding several copies of their HTML at once"""
+        # Warm up template cache and lazily initialized modules
+        self.block.student_view({})
+        tracemalloc.start()
+        try:
+            fragment = self.block.student_view({})
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        slides_size = self.SLIDES * self.SLIDE_SIZE
+        self.assertGreater(len(fragment.content), slides_size)
+        self.assertEqual(fragment.content.count('class="slide multi-problem-child-'), self.SLIDES)
+        # Rendering all slides in a single template needs more than 4 times the slides size
+        self.assertLess(peak, slides_size * 3)
+
+    def test_student_view_slide_order(self):
+        """Verify slides are assembled in order with their index"""
+        content = self.block.student_view({}).content
+        positions = [content.index(f'data-index="{index}"') for index in range(self.SLIDES)]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn('multi-problem-child-199', content)
+
+    def test_student_view_without_slides(self):
+        """Verify slides are not rendered when test results are displayed"""
+        self.block.current_slide = -1
+        content = self.block.student_view({}).content
+        self.assertNotIn('class="slide ', content)
+        self.assertIn('<div class="problem-test-score-container">', content)
+
+
+class StudentViewStateTests(TestCaseMixin, unittest.TestCase):
+    """ Tests for user state written by the student view """
+
+    def setUp(self):
+        self.block = make_multi_problem_block(3)
+        self.patch_workbench()
+
+    def test_repeated_view_does_not_write_state(self):
+        """Verify viewing the block again without progress leaves no user state to save"""
+        self.block.student_view({})
+        self.block.save()
+        # Mimic a fresh block instance of the next request
+        self.block._field_data_cache.clear()  # pylint: disable=protected-access
+        self.block._dirty_fields.clear()  # pylint: disable=protected-access
+        self.block.student_view({})
+        self.assertEqual(self.block._get_fields_to_save(), [])  # pylint: disable=protected-access
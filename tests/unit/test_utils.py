@@ -0,0 +1,105 @@
+import unittest
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import translation
+
+from multi_problem_xblock.multi_problem_xblock import loader
+from multi_problem_xblock.utils import TEMPLATE_CACHE, ContentCache, LRUCache, render_django_template
+
+
+class LRUCacheTests(unittest.TestCase):
+    """ Unit tests for the in-memory LRU cache """
+
+    def setUp(self):
+        self.now = 0
+        self.cache = LRUCache(maxsize=2, ttl=10, timer=lambda: self.now)
+
+    def test_get_set(self):
+        self.cache.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+
+    def test_least_recently_used_eviction(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        # Access 'a' so that 'b' becomes least recently used
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('c'), 3)
+
+    def test_expiry(self):
+        self.cache.set('key', 'value')
+        self.now = 9
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.now = 10
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_delete_and_clear(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.delete('a')
+        self.cache.delete('missing')
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+
+class ContentCacheTests(unittest.TestCase):
+    """ Unit tests for the content cache shared by all learners """
+
+    def setUp(self):
+        self.cache = ContentCache('test', maxsize=2)
+
+    def test_get_set_many(self):
+        self.cache.set_many({('problem', 'v1', 'a'): 'A', ('problem', 'v1', 'b'): 'B'})
+        self.assertEqual(self.cache.get_many([('problem', 'v1', 'a'), ('problem', 'v2', 'a')]), {
+            ('problem', 'v1', 'a'): 'A',
+        })
+        self.cache.clear()
+        self.assertEqual(self.cache.get_many([('problem', 'v1', 'a')]), {})
+
+    @override_settings(
+        CACHES={'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test'}},
+        XBLOCK_SETTINGS={'MultiProblemBlock': {'CONTENT_CACHE': 'shared'}},
+    )
+    def test_shared_backend(self):
+        self.cache.set_many({('problem', 'v1', 'a'): 'A'})
+        # Another process only shares entries through the Django cache
+        other_cache = ContentCache('test')
+        self.assertEqual(other_cache.get_many([('problem', 'v1', 'a'), ('problem', 'v1', 'b')]), {
+            ('problem', 'v1', 'a'): 'A',
+        })
+        self.assertEqual(len(other_cache.local), 1)
+
+
+class TemplateCacheTests(unittest.TestCase):
+    """ Unit tests for the compiled template cache """
+
+    TEMPLATE = '{% load i18n %}{% trans "Submit" %} {{ value }}'
+
+    def setUp(self):
+        TEMPLATE_CACHE.clear()
+        self.addCleanup(TEMPLATE_CACHE.clear)
+        patcher = mock.patch.object(loader, 'load_unicode', return_value=self.TEMPLATE)
+        self.load_unicode = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_template_compiled_once_per_language(self):
+        self.assertEqual(render_django_template(loader, '/template.html', {'value': 1}), 'Submit 1')
+        self.assertEqual(render_django_template(loader, '/template.html', {'value': 2}), 'Submit 2')
+        self.assertEqual(self.load_unicode.call_count, 1)
+        with translation.override('eo'):
+            render_django_template(loader, '/template.html', {'value': 3})
+        self.assertEqual(self.load_unicode.call_count, 2)
+
+    @override_settings(XBLOCK_SETTINGS={'MultiProblemBlock': {'TEMPLATE_CACHE': False}})
+    def test_template_cache_disabled(self):
+        render_django_template(loader, '/template.html', {'value': 1})
+        render_django_template(loader, '/template.html', {'value': 2})
+        self.assertEqual(self.load_unicode.call_count, 2)
+        self.assertEqual(len(TEMPLATE_CACHE), 0)
@@ -1,4 +1,5 @@
 import json
+from itertools import count
 from unittest.mock import MagicMock, Mock, patch
 
 from sample_xblocks.basic.problem import ProblemBlock, String
@@ -7,6 +8,8 @@ from workbench.runtime import WorkbenchRuntime
 from xblock.core import Scope
 from xblock.field_data import DictFieldData
 
+from multi_problem_xblock.multi_problem_xblock import MultiProblemBlock
+
 
 def make_request(data, method='POST'):
     """ Make a webob JSON Request """
@@ -31,6 +34,8 @@ def instantiate_block(cls, fields=None):
         field_data=field_data,
         scope_ids=MagicMock()
     )
+    # Mimic block classes mixed by the runtime, required by the workbench settings service.
+    block.unmixed_class = cls
     block.children = children
     block.runtime.get_block = lambda child_id: children[child_id]
     block.usage_key.__str__.return_value = usage_key
@@ -43,14 +48,46 @@ class SampleProblemBlock(ProblemBlock):
     question = String(scope=Scope.content)
     showanswer = String(scope=Scope.settings, default="")
     show_correctness = String(scope=Scope.settings, default="")
-    lcp = Mock(student_answers={1: 1})
+    lcp = Mock(student_answers={1: 1}, correct_map=Mock(get_msg=Mock(return_value='')))
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Return incremental mock question answer text each time it is called.
-        self.lcp.find_question_label.side_effect = [f'question{x}' for x in range(3)]
-        self.lcp.find_answer_text.side_effect = [f'answer{x}' for x in range(3)]
-        self.lcp.find_correct_answer_text.side_effect = [f'correct_answer{x}' for x in range(3)]
+        self.lcp.find_question_label.side_effect = (f'question{x}' for x in count())
+        self.lcp.find_answer_text.side_effect = (f'answer{x}' for x in count())
+        self.lcp.find_correct_answer_text.side_effect = (f'correct_answer{x}' for x in count())
+
+    def is_correct(self):
+        return False
+
+
+def make_multi_problem_block(children_count):
+    """
+    Instantiate a multi problem block selecting the given number of sample child problems.
+    """
+    children = {}
+    for index in range(children_count):
+        usage_key = f'block-v1:edx+cs1+test+type@problem+block@{index}'
+        children[usage_key] = instantiate_block(SampleProblemBlock, fields={'usage_key': usage_key})
+    block = instantiate_block(MultiProblemBlock, fields={
+        'usage_key': 'block-v1:edx+cs1+test+type@multi_problem+block@1',
+        'children': children,
+    })
+    block.selected_children = lambda: [('problem', usage_key) for usage_key in children]
+    block.allow_resetting_children = True
+    return block
+
+
+class CountingBlockBackend:
+    """ Test double of a block storage backend, counting round-trips done to load blocks """
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.round_trips = 0
+
+    def get_block(self, usage_key):
+        self.round_trips += 1
+        return self.blocks[usage_key]
 
 
 class TestCaseMixin:
@@ -61,6 +98,7 @@ class TestCaseMixin:
     GET_OVERALL_PROGRESS_HANDLER = 'get_overall_progress'
     GET_TEST_SCORES = 'get_test_scores'
     RESET_HANDLER = 'reset_selected_children'
+    GET_STATE_HANDLER = 'get_state'
 
     def patch_workbench(self):
         self.apply_patch(